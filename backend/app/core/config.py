@@ -12,6 +12,9 @@ class Settings(BaseSettings):
     MS_GRAPH_SECRET_ID: str = ""
     MS_GRAPH_REDIRECT_URI: str = "http://localhost:5173/auth/callback"
 
+    # Redis for state shared across workers (OAuth state); in-memory if unset
+    REDIS_URL: str = ""
+
     class Config:
         env_file = ".env"
 
@@ -1,10 +1,33 @@
-from sqlalchemy import create_engine
+from sqlalchemy import DateTime, Enum, create_engine, event, inspect, text
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.sql.expression import FunctionElement
 from app.core.config import settings
 
+is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+
 # SQLite needs check_same_thread=False for FastAPI
-connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
+connect_args = {"check_same_thread": False} if is_sqlite else {}
+# The reminder scheduler can sit idle for minutes between checks; pre-ping
+# replaces pooled server connections that were dropped in the meantime
+engine = create_engine(settings.DATABASE_URL, connect_args=connect_args, pool_pre_ping=not is_sqlite)
+
+if is_sqlite:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # SQLite leaves foreign keys unenforced by default; ON DELETE CASCADE
+        # on reminders relies on them
+        cursor.execute("PRAGMA foreign_keys=ON")
+        # WAL lets the polling endpoints read while parse/reanalyze write, and
+        # NORMAL sync skips the fsync on every commit that FULL forces
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -15,3 +38,147 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+class utcnow(FunctionElement):
+    """Current UTC time evaluated by the database, as a naive timestamp.
+
+    Matches how DateTime columns are stored here (naive UTC, as produced by
+    datetime.utcnow), so comparisons can run entirely in SQL.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "sqlite")
+def _sqlite_utcnow(element, compiler, **kw):
+    # Same text layout SQLAlchemy stores SQLite datetimes in, with millisecond
+    # precision, so the string comparison orders correctly
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+@compiles(utcnow, "postgresql")
+def _postgresql_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+def ensure_indexes():
+    """Create any model indexes missing from existing tables.
+
+    create_all() only emits indexes together with a newly created table, so
+    indexes added to a model later would never reach an existing database.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+# Enum-backed columns, stored as the enum value strings
+ENUM_COLUMNS = {
+    "tasks": ("category", "status", "priority"),
+    "reminders": ("status",),
+}
+
+
+def normalize_enum_columns():
+    """Rewrite enum columns stored by member name (e.g. "TODO") to their values.
+
+    Older databases used SQLAlchemy Enum columns, which persist the member
+    name. Every enum value is its lower-cased name, so lower() converts them
+    in place and leaves already-migrated rows untouched.
+
+    On Postgres those columns are native ENUM types that only accept the old
+    names, so they are first converted to VARCHAR (lower-casing as they go)
+    and the then-unused enum types are dropped.
+    """
+    from app.models.reminder import Reminder
+    from app.models.task import Task
+
+    model_tables = {"tasks": Task.__table__, "reminders": Reminder.__table__}
+
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        enum_types = set()
+        for table, columns in ENUM_COLUMNS.items():
+            if not inspector.has_table(table):
+                continue
+            existing = {c["name"]: c["type"] for c in inspector.get_columns(table)}
+            for column in columns:
+                if column not in existing:
+                    continue
+                if conn.dialect.name == "postgresql" and isinstance(existing[column], Enum):
+                    length = model_tables[table].c[column].type.length
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} "
+                        f"TYPE VARCHAR({length}) USING lower({column}::text)"
+                    ))
+                    enum_types.add(existing[column].name)
+                else:
+                    conn.execute(text(
+                        f"UPDATE {table} SET {column} = lower({column}) WHERE {column} <> lower({column})"
+                    ))
+        for name in enum_types:
+            conn.execute(text(f'DROP TYPE IF EXISTS "{name}"'))
+
+
+def backfill_task_status():
+    """Give tasks created before status was NOT NULL a status for Kanban."""
+    with engine.begin() as conn:
+        if "status" in {c["name"] for c in inspect(conn).get_columns("tasks")}:
+            conn.execute(text("UPDATE tasks SET status = 'todo' WHERE status IS NULL"))
+
+
+def ensure_reminder_cascade():
+    """Make an existing reminders table cascade deletes from its task.
+
+    Task.reminders uses passive_deletes, leaving reminder cleanup to the
+    database, but tables created before ondelete="CASCADE" was declared
+    still have a plain foreign key. SQLite can't alter a constraint, so the
+    table is rebuilt from the model (dropping reminders already orphaned by
+    earlier bulk deletes); other databases swap the constraint in place.
+    """
+    from app.models.reminder import Reminder
+
+    if not is_sqlite:
+        with engine.begin() as conn:
+            for fk in inspect(conn).get_foreign_keys("reminders"):
+                ondelete = (fk["options"].get("ondelete") or "").upper()
+                if fk["referred_table"] != "tasks" or ondelete == "CASCADE" or not fk["name"]:
+                    continue
+                conn.execute(text(f'ALTER TABLE reminders DROP CONSTRAINT "{fk["name"]}"'))
+                conn.execute(text(
+                    f'ALTER TABLE reminders ADD CONSTRAINT "{fk["name"]}" '
+                    "FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE"
+                ))
+        return
+
+    with engine.connect() as conn:
+        fks = conn.exec_driver_sql("PRAGMA foreign_key_list(reminders)").mappings().all()
+        if not fks or any(fk["on_delete"] == "CASCADE" for fk in fks):
+            return
+
+        # Foreign keys must be off while the table is swapped out
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        conn.commit()
+        with conn.begin():
+            old_indexes = conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = 'reminders' AND sql IS NOT NULL"
+            ).scalars().all()
+            conn.exec_driver_sql("ALTER TABLE reminders RENAME TO _reminders_old")
+            for name in old_indexes:
+                conn.exec_driver_sql(f'DROP INDEX "{name}"')
+            Reminder.__table__.create(conn)
+            columns = ", ".join(c.name for c in Reminder.__table__.columns)
+            conn.exec_driver_sql(
+                f"INSERT INTO reminders ({columns}) SELECT {columns} FROM _reminders_old "
+                "WHERE task_id IN (SELECT id FROM tasks)"
+            )
+            conn.exec_driver_sql("DROP TABLE _reminders_old")
+        conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+        conn.commit()
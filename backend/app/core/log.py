@@ -0,0 +1,38 @@
+"""
+Non-blocking logging for request handlers.
+
+Loggers from get_logger() only enqueue records; a background listener thread
+writes them to stderr, so async handlers never block on a stderr write.
+"""
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+_queue: queue.SimpleQueue = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+
+
+def _start_listener():
+    global _listener
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(levelname)s [%(name)s] %(message)s"))
+    _listener = QueueListener(_queue, handler)
+    _listener.start()
+    # Flush queued records on interpreter exit
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return an INFO-level logger whose records go through the shared queue."""
+    if _listener is None:
+        _start_listener()
+
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        logger.addHandler(QueueHandler(_queue))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
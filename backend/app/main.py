@@ -1,19 +1,39 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import engine, Base
+from fastapi.responses import ORJSONResponse
+from app.core.database import (
+    engine,
+    Base,
+    backfill_task_status,
+    ensure_indexes,
+    ensure_reminder_cascade,
+    normalize_enum_columns,
+)
 from app.routes import tasks_router, reminders_router, graph_router, teams_router
 from app.services.scheduler import start_scheduler, stop_scheduler
+from app.services.teams_service import teams_service
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     Base.metadata.create_all(bind=engine)
+    ensure_reminder_cascade()
+    ensure_indexes()
+    normalize_enum_columns()
+    backfill_task_status()
     start_scheduler()
+    token_refresh = asyncio.create_task(teams_service.refresh_token_loop())
     yield
     # Shutdown
+    token_refresh.cancel()
+    # Let the loop finish before its HTTP client is closed below
+    with suppress(asyncio.CancelledError):
+        await token_refresh
     stop_scheduler()
+    await teams_service.aclose()
 
 
 app = FastAPI(
@@ -21,6 +41,7 @@ app = FastAPI(
     description="A task management API with classification and reminders",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
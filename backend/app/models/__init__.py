@@ -1,4 +1,5 @@
 from app.models.task import Task, TaskCategory
 from app.models.reminder import Reminder, ReminderStatus
+from app.models.ai_cache import ReanalysisCache
 
-__all__ = ["Task", "TaskCategory", "Reminder", "ReminderStatus"]
+__all__ = ["Task", "TaskCategory", "Reminder", "ReminderStatus", "ReanalysisCache"]
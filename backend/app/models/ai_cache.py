@@ -0,0 +1,46 @@
+import hashlib
+from datetime import datetime, timedelta
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.dialects import postgresql, sqlite
+from app.core.database import Base
+
+# Verdicts older than this are ignored on lookup and pruned by the scheduler,
+# so prompt or model changes eventually reach every task
+REANALYSIS_CACHE_TTL = timedelta(days=30)
+
+
+def reanalysis_key(clean_text: str, raw_text: str, category: str) -> str:
+    """Hash the task fields that make up the re-analysis prompt."""
+    payload = "\x00".join((clean_text or "", raw_text or "", category or ""))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ReanalysisCache(Base):
+    """Memoized AI re-analysis outcome, keyed by reanalysis_key()."""
+    __tablename__ = "ai_reanalysis_cache"
+
+    text_hash = Column(String(64), primary_key=True)
+
+    # JSON object with is_valid, clean_text, category and reason
+    result_json = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+def upsert_reanalysis_results(dialect_name: str, results: dict[str, str]):
+    """
+    INSERT ... ON CONFLICT for new verdicts (text_hash -> result_json).
+
+    Concurrent re-analyses can store the same key; the later one overwrites
+    the row (refreshing an expired one) instead of failing the request.
+    """
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    now = datetime.utcnow()
+    stmt = dialect.insert(ReanalysisCache).values([
+        {"text_hash": key, "result_json": result_json, "created_at": now}
+        for key, result_json in results.items()
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[ReanalysisCache.text_hash],
+        set_={"result_json": stmt.excluded.result_json, "created_at": stmt.excluded.created_at},
+    )
@@ -1,6 +1,6 @@
 import enum
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -14,9 +14,14 @@ class Reminder(Base):
     __tablename__ = "reminders"
 
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     remind_at = Column(DateTime, nullable=False)
-    status = Column(Enum(ReminderStatus), default=ReminderStatus.PENDING)
+    status = Column(String(16), default=ReminderStatus.PENDING.value)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     task = relationship("Task", back_populates="reminders")
+
+    # Serves the pending/due reminder lookups (notifications poll and scheduler)
+    __table_args__ = (
+        Index("ix_reminders_status_remind_at", "status", "remind_at"),
+    )
@@ -1,7 +1,7 @@
 import enum
-import json
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Boolean
+import orjson
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -27,6 +27,27 @@ class TaskPriority(str, enum.Enum):
     LOW = "low"
 
 
+# Value -> member lookups, for parsing untrusted strings (e.g. AI output)
+# without raising and catching ValueError on every miss
+CATEGORY_BY_VALUE = {c.value: c for c in TaskCategory}
+STATUS_BY_VALUE = {s.value: s for s in TaskStatus}
+PRIORITY_BY_VALUE = {p.value: p for p in TaskPriority}
+
+
+def enum_by_value(by_value: dict, value, default=None):
+    """Look up an enum member in a *_BY_VALUE dict, giving default for
+    unknown values and for non-strings (AI output can be any JSON type)."""
+    return by_value.get(value, default) if isinstance(value, str) else default
+
+
+def decode_json_list(value: str | None) -> list:
+    """Decode a JSON list column, treating empty or malformed values as []."""
+    try:
+        return orjson.loads(value) if value else []
+    except (orjson.JSONDecodeError, TypeError):
+        return []
+
+
 class Task(Base):
     __tablename__ = "tasks"
 
@@ -42,10 +63,10 @@ class Task(Base):
     # Full original message context (for viewing in Graph modal)
     original_message = Column(Text, nullable=True)
 
-    # Task metadata
-    category = Column(Enum(TaskCategory), default=TaskCategory.OTHER)
-    status = Column(Enum(TaskStatus), default=TaskStatus.TODO)
-    priority = Column(Enum(TaskPriority), default=TaskPriority.MEDIUM)
+    # Task metadata (stored as the enum values; schemas parse them back into enums)
+    category = Column(String(20), default=TaskCategory.OTHER.value)
+    status = Column(String(20), nullable=False, default=TaskStatus.TODO.value, server_default=TaskStatus.TODO.value)
+    priority = Column(String(10), default=TaskPriority.MEDIUM.value)
 
     # Jira integration
     jira_ticket = Column(String(50), nullable=True)
@@ -67,33 +88,57 @@ class Task(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    reminders = relationship("Reminder", back_populates="task", cascade="all, delete-orphan")
+    # Reminder rows are removed by the database's ON DELETE CASCADE, so deleting
+    # a task doesn't load its reminders first
+    reminders = relationship("Reminder", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
 
     @property
     def depends_on(self) -> list[int]:
-        """Get depends_on as a list of integers."""
-        try:
-            return json.loads(self.depends_on_json or "[]")
-        except (json.JSONDecodeError, TypeError):
-            return []
+        """Get depends_on as a list of integers.
+
+        The decoded list is cached against the JSON it came from, so repeated
+        reads (the graph builder walks it several times per task) parse once,
+        while a refresh or direct write of depends_on_json still invalidates
+        it. Treat the returned list as read-only; assign to change it.
+        """
+        raw = self.depends_on_json
+        cached = self.__dict__.get("_depends_on_cache")
+        if cached is None or cached[0] != raw:
+            cached = (raw, decode_json_list(raw))
+            self._depends_on_cache = cached
+        return cached[1]
 
     @depends_on.setter
     def depends_on(self, value: list[int]):
         """Set depends_on from a list of integers."""
-        self.depends_on_json = json.dumps(value or [])
+        value = list(value or [])
+        self.depends_on_json = orjson.dumps(value).decode()
+        self._depends_on_cache = (self.depends_on_json, value)
+
+    @property
+    def clean_text_lower(self) -> str:
+        """clean_text lowercased, computed once per value of clean_text.
+
+        The graph builder and suggestion heuristics each match against the
+        lowercase text; caching it the same way as depends_on means they share
+        one copy, and edits to clean_text are still picked up.
+        """
+        raw = self.clean_text
+        cached = self.__dict__.get("_clean_text_lower_cache")
+        if cached is None or cached[0] is not raw:
+            cached = (raw, raw.lower() if raw else "")
+            self._clean_text_lower_cache = cached
+        return cached[1]
 
     @property
     def improvement_history(self) -> list[dict]:
         """Get improvement history as a list of dicts."""
-        try:
-            return json.loads(self.improvement_history_json or "[]")
-        except (json.JSONDecodeError, TypeError):
-            return []
+        return decode_json_list(self.improvement_history_json)
 
     @improvement_history.setter
     def improvement_history(self, value: list[dict]):
         """Set improvement history from a list of dicts."""
-        self.improvement_history_json = json.dumps(value or [])
+        self.improvement_history_json = orjson.dumps(value or []).decode()
 
     def add_improvement(self, old_text: str, new_text: str, reason: str = None):
         """Add an improvement record to history."""
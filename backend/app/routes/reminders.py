@@ -1,15 +1,29 @@
 from typing import List
-from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, utcnow
 from app.models.task import Task
 from app.models.reminder import Reminder, ReminderStatus
 from app.schemas.reminder import ReminderCreate, ReminderResponse
+from app.services.scheduler import wake_for_reminder
 
 router = APIRouter(tags=["reminders"])
 
 
+def _to_response(reminder: Reminder, task_text: str | None) -> ReminderResponse:
+    """Build a response from a persisted reminder."""
+    return ReminderResponse(
+        id=reminder.id,
+        task_id=reminder.task_id,
+        remind_at=reminder.remind_at,
+        status=reminder.status,
+        created_at=reminder.created_at,
+        task_text=task_text,
+    )
+
+
 @router.post("/tasks/{task_id}/reminders", response_model=ReminderResponse)
 def create_reminder(task_id: int, request: ReminderCreate, db: Session = Depends(get_db)):
     """Create a reminder for a task."""
@@ -20,97 +34,74 @@ def create_reminder(task_id: int, request: ReminderCreate, db: Session = Depends
     reminder = Reminder(
         task_id=task_id,
         remind_at=request.remind_at,
-        status=ReminderStatus.PENDING,
+        status=ReminderStatus.PENDING.value,
     )
     db.add(reminder)
     db.commit()
     db.refresh(reminder)
-
-    return ReminderResponse(
-        id=reminder.id,
-        task_id=reminder.task_id,
-        remind_at=reminder.remind_at,
-        status=reminder.status,
-        created_at=reminder.created_at,
-        task_text=task.clean_text,
+    wake_for_reminder(reminder.remind_at)
+
+    return _to_response(reminder, task.clean_text)
+
+
+# Reminder list statements, built once at import. Values are supplied as bind
+# parameters so every call reuses the same statement and its cached compiled
+# SQL. Columns are named to match ReminderResponse so rows can be returned
+# as they are.
+SELECT_REMINDERS = (
+    select(
+        Reminder.id,
+        Reminder.task_id,
+        Reminder.remind_at,
+        Reminder.status,
+        Reminder.created_at,
+        Task.clean_text.label("task_text"),
     )
+    .join(Task)
+    .where(Task.user_id == bindparam("user_id"))
+    .order_by(Reminder.remind_at)
+)
+SELECT_PENDING_REMINDERS = SELECT_REMINDERS.where(Reminder.status == bindparam("status"))
+SELECT_DUE_REMINDERS = SELECT_PENDING_REMINDERS.where(Reminder.remind_at <= utcnow())
+
+
+def _rows_response(rows) -> ORJSONResponse:
+    """Return reminder list rows as JSON.
+
+    Returning a response directly skips response_model validation; the rows
+    are already shaped like ReminderResponse by the select above.
+    """
+    return ORJSONResponse([dict(row) for row in rows])
 
 
 @router.get("/reminders", response_model=List[ReminderResponse])
 def get_reminders(db: Session = Depends(get_db)):
     """Get all reminders."""
-    reminders = (
-        db.query(Reminder)
-        .join(Task)
-        .filter(Task.user_id == "1")
-        .order_by(Reminder.remind_at)
-        .all()
-    )
+    rows = db.execute(SELECT_REMINDERS, {"user_id": "1"}).mappings().all()
 
-    return [
-        ReminderResponse(
-            id=r.id,
-            task_id=r.task_id,
-            remind_at=r.remind_at,
-            status=r.status,
-            created_at=r.created_at,
-            task_text=r.task.clean_text,
-        )
-        for r in reminders
-    ]
+    return _rows_response(rows)
 
 
 @router.get("/reminders/pending", response_model=List[ReminderResponse])
 def get_pending_reminders(db: Session = Depends(get_db)):
     """Get pending reminders."""
-    reminders = (
-        db.query(Reminder)
-        .join(Task)
-        .filter(Task.user_id == "1", Reminder.status == ReminderStatus.PENDING)
-        .order_by(Reminder.remind_at)
-        .all()
-    )
+    rows = db.execute(
+        SELECT_PENDING_REMINDERS,
+        {"user_id": "1", "status": ReminderStatus.PENDING.value},
+    ).mappings().all()
 
-    return [
-        ReminderResponse(
-            id=r.id,
-            task_id=r.task_id,
-            remind_at=r.remind_at,
-            status=r.status,
-            created_at=r.created_at,
-            task_text=r.task.clean_text,
-        )
-        for r in reminders
-    ]
+    return _rows_response(rows)
 
 
 @router.get("/notifications", response_model=List[ReminderResponse])
 def get_notifications(db: Session = Depends(get_db)):
     """Get reminders that are due (for polling)."""
-    now = datetime.utcnow()
-    reminders = (
-        db.query(Reminder)
-        .join(Task)
-        .filter(
-            Task.user_id == "1",
-            Reminder.status == ReminderStatus.PENDING,
-            Reminder.remind_at <= now,
-        )
-        .order_by(Reminder.remind_at)
-        .all()
-    )
+    rows = db.execute(
+        SELECT_DUE_REMINDERS,
+        {"user_id": "1", "status": ReminderStatus.PENDING.value},
+    ).mappings().all()
 
-    return [
-        ReminderResponse(
-            id=r.id,
-            task_id=r.task_id,
-            remind_at=r.remind_at,
-            status=r.status,
-            created_at=r.created_at,
-            task_text=r.task.clean_text,
-        )
-        for r in reminders
-    ]
+    return _rows_response(rows)
 
 
 @router.delete("/reminders/{reminder_id}")
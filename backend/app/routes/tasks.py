@@ -1,10 +1,19 @@
+from datetime import datetime
 from typing import List
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.models.task import Task, TaskCategory, TaskStatus, TaskPriority
+from app.core.log import get_logger
+from app.models.task import Task, TaskStatus, TaskPriority, CATEGORY_BY_VALUE, PRIORITY_BY_VALUE, enum_by_value
+from app.models.reminder import Reminder
+from app.models.ai_cache import REANALYSIS_CACHE_TTL, ReanalysisCache, reanalysis_key, upsert_reanalysis_results
 from app.schemas.task import (
     TaskResponse,
+    task_content,
+    task_row_content,
     TaskParseRequest,
     TaskParseResponse,
     TaskStatusUpdate,
@@ -12,6 +21,7 @@ from app.schemas.task import (
     MessageSuggestion,
     EmailSuggestion,
     DeployChecklist,
+    TaskSuggestions,
     MessageAnalysisRequest,
     MessageAnalysisResponse,
     ReanalyzeRequest,
@@ -23,6 +33,7 @@ from app.services.suggestion_service import SuggestionService
 from app.services.ai_service import AIService, TaskValidator
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
+logger = get_logger("tasks")
 
 
 @router.post("/parse", response_model=TaskParseResponse)
@@ -31,26 +42,22 @@ async def parse_tasks(request: TaskParseRequest, db: Session = Depends(get_db)):
     Parse multiline text into individual tasks using AI.
     Now includes strict validation to filter out meaningless tasks.
     """
-    lines = request.text.strip().split('\n')
-    clean_lines = []
-    line_mapping = []  # Maps clean line index to original line
-
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
-        clean_text = TaskClassifier.clean_text(line)
-        if clean_text:
-            clean_lines.append(clean_text)
-            line_mapping.append((i, line, clean_text))
+    lines = (line.strip() for line in request.text.strip().split('\n'))
+    # Maps clean line index to original line
+    line_mapping = [
+        (i, line, clean_text)
+        for i, line in enumerate(lines)
+        if line and (clean_text := TaskClassifier.clean_text(line))
+    ]
+    clean_lines = [clean_text for _, _, clean_text in line_mapping]
 
     if not clean_lines:
         return TaskParseResponse(tasks=[], count=0, filtered_count=0)
 
     # Use AI to analyze all tasks at once with strict validation
-    print(f"[AI] Analyzing {len(clean_lines)} tasks with strict validation...")
+    logger.info("Analyzing %d tasks with strict validation...", len(clean_lines))
     ai_results = await AIService.analyze_tasks(clean_lines)
-    print(f"[AI] Analysis complete: {len(ai_results)} results")
+    logger.info("Analysis complete: %d results", len(ai_results))
 
     created_tasks = []
     task_id_map = {}  # Maps 1-indexed position to actual task ID
@@ -62,32 +69,24 @@ async def parse_tasks(request: TaskParseRequest, db: Session = Depends(get_db)):
 
         # Check if AI marked this task as invalid
         if not ai_result.get("is_valid", True):
-            print(f"[FILTER] Skipping invalid task: '{clean_text[:50]}...' - Reason: {ai_result.get('reason', 'unknown')}")
+            logger.debug("Skipping invalid task: '%s...' - Reason: %s", clean_text[:50], ai_result.get('reason', 'unknown'))
             filtered_count += 1
             continue
 
         # Additional validation check
-        if not TaskValidator.is_meaningful_task(clean_text, raw_text):
-            print(f"[FILTER] Task failed validation: '{clean_text[:50]}...'")
+        if not TaskValidator.is_meaningful_task(clean_text):
+            logger.debug("Task failed validation: '%s...'", clean_text[:50])
             filtered_count += 1
             continue
 
         # Get category from AI or fallback to classifier
-        category_str = ai_result.get("category", "other")
-        try:
-            category = TaskCategory(category_str)
-        except ValueError:
-            category = TaskClassifier.classify(clean_text)
+        category = enum_by_value(CATEGORY_BY_VALUE, ai_result.get("category", "other")) or TaskClassifier.classify(clean_text)
 
         # Use improved text if provided
         final_clean_text = ai_result.get("improved_text") or clean_text
 
         # Determine priority
-        priority_str = ai_result.get("priority", "medium")
-        try:
-            priority = TaskPriority(priority_str)
-        except ValueError:
-            priority = TaskPriority.MEDIUM
+        priority = enum_by_value(PRIORITY_BY_VALUE, ai_result.get("priority", "medium"), TaskPriority.MEDIUM)
 
         task = Task(
             user_id="1",
@@ -101,19 +100,30 @@ async def parse_tasks(request: TaskParseRequest, db: Session = Depends(get_db)):
             assigned_to=ai_result.get("assigned_to"),
             was_improved=bool(ai_result.get("improved_text")),
         )
-        db.add(task)
-        db.flush()  # Get the ID without committing
         created_tasks.append((task, ai_result, idx + 1))
-        task_id_map[idx + 1] = task.id  # 1-indexed for AI results
 
-    # Second pass: set dependencies using actual task IDs
+    # Insert all valid tasks in one flush to get their IDs without committing
+    db.add_all([task for task, _, _ in created_tasks])
+    db.flush()
+    for task, _, original_idx in created_tasks:
+        task_id_map[original_idx] = task.id  # 1-indexed for AI results
+
+    # Second pass: set dependencies using actual task IDs. New rows already
+    # default to "[]", so only tasks with dependencies need an UPDATE, and
+    # those go out as one executemany keyed by primary key.
+    dependency_updates = []
     for task, ai_result, original_idx in created_tasks:
         depends_on_indices = ai_result.get("depends_on_indices", [])
-        depends_on_ids = []
-        for dep_idx in depends_on_indices:
-            if dep_idx in task_id_map and dep_idx != original_idx:
-                depends_on_ids.append(task_id_map[dep_idx])
-        task.depends_on = depends_on_ids
+        depends_on_ids = [
+            task_id_map[dep_idx]
+            for dep_idx in depends_on_indices
+            if dep_idx in task_id_map and dep_idx != original_idx
+        ]
+        if depends_on_ids:
+            dependency_updates.append({"id": task.id, "depends_on_json": orjson.dumps(depends_on_ids).decode()})
+
+    if dependency_updates:
+        db.execute(update(Task), dependency_updates)
 
     db.commit()
 
@@ -121,27 +131,66 @@ async def parse_tasks(request: TaskParseRequest, db: Session = Depends(get_db)):
     result_tasks = []
     for task, _, _ in created_tasks:
         db.refresh(task)
-        result_tasks.append(TaskResponse.from_task(task))
-
-    print(f"[RESULT] Created {len(result_tasks)} tasks, filtered {filtered_count} invalid tasks")
-    return TaskParseResponse(tasks=result_tasks, count=len(result_tasks), filtered_count=filtered_count)
+        result_tasks.append(task_content(task))
+
+    logger.info("Created %d tasks, filtered %d invalid tasks", len(result_tasks), filtered_count)
+    # Returned directly like the task list, skipping response_model validation
+    return ORJSONResponse({"tasks": result_tasks, "count": len(result_tasks), "filtered_count": filtered_count})
+
+
+# Task list statements, built once at import and parameterised with bind
+# parameters so each request reuses the cached compiled SQL. Selecting plain
+# columns rather than Task entities skips ORM identity-map and attribute
+# instrumentation.
+SELECT_TASKS = (
+    select(
+        Task.id,
+        Task.user_id,
+        Task.raw_text,
+        Task.clean_text,
+        Task.original_message,
+        Task.category,
+        Task.status,
+        Task.priority,
+        Task.jira_ticket,
+        Task.assigned_to,
+        Task.due_at,
+        Task.was_improved,
+        Task.improvement_history_json,
+        Task.created_at,
+        Task.updated_at,
+        Task.depends_on_json,
+    )
+    .where(Task.user_id == bindparam("user_id"))
+    # id breaks ties between tasks created in the same batch
+    .order_by(Task.created_at.desc(), Task.id.desc())
+)
+SELECT_TASK_REMINDERS = (
+    select(Reminder.task_id, Reminder.id, Reminder.remind_at, Reminder.status)
+    .join(Task)
+    .where(Task.user_id == bindparam("user_id"))
+    .order_by(Reminder.id)
+)
 
 
 @router.get("", response_model=List[TaskResponse])
 def get_tasks(db: Session = Depends(get_db)):
     """Get all tasks for the mock user."""
-    tasks = db.query(Task).filter(Task.user_id == "1").order_by(Task.created_at.desc()).all()
-
-    # Ensure all tasks have valid status for Kanban
-    result = []
-    for t in tasks:
-        # Fix any null status
-        if t.status is None:
-            t.status = TaskStatus.TODO
-            db.commit()
-        result.append(TaskResponse.from_task(t))
+    params = {"user_id": "1"}
+    rows = db.execute(SELECT_TASKS, params).mappings().all()
+
+    # Load reminders for all tasks in a single query
+    reminders_by_task = {}
+    for r in db.execute(SELECT_TASK_REMINDERS, params):
+        reminders_by_task.setdefault(r.task_id, []).append(
+            {"id": r.id, "remind_at": r.remind_at, "status": r.status}
+        )
 
-    return result
+    # Returning a response directly skips response_model validation; rows are
+    # already shaped like TaskResponse by task_row_content
+    return ORJSONResponse(
+        [task_row_content(row, reminders_by_task.get(row["id"], [])) for row in rows]
+    )
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
@@ -150,7 +199,7 @@ def get_task(task_id: int, db: Session = Depends(get_db)):
     task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return TaskResponse.from_task(task)
+    return ORJSONResponse(task_content(task))
 
 
 @router.delete("")
@@ -181,7 +230,7 @@ def update_task_status(task_id: int, status_update: TaskStatusUpdate, db: Sessio
     task.status = status_update.status
     db.commit()
     db.refresh(task)
-    return TaskResponse.from_task(task)
+    return ORJSONResponse(task_content(task))
 
 
 @router.patch("/{task_id}", response_model=TaskResponse)
@@ -213,7 +262,7 @@ def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get
 
     db.commit()
     db.refresh(task)
-    return TaskResponse.from_task(task)
+    return ORJSONResponse(task_content(task))
 
 
 @router.post("/{task_id}/suggest/message", response_model=MessageSuggestion)
@@ -252,6 +301,21 @@ async def suggest_deploy_checklist(task_id: int, db: Session = Depends(get_db)):
     return DeployChecklist(items=items)
 
 
+@router.post("/{task_id}/suggest/all", response_model=TaskSuggestions)
+async def suggest_all(task_id: int, db: Session = Depends(get_db)):
+    """Generate the message, email and deploy checklist in one AI call."""
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    suggestions = await AIService.bundle_suggestions(task.clean_text)
+    return TaskSuggestions(
+        message=MessageSuggestion(suggested_message=suggestions["message"]),
+        email=EmailSuggestion(subject=suggestions["email_subject"], body=suggestions["email_body"]),
+        deploy_checklist=DeployChecklist(items=suggestions["checklist"]),
+    )
+
+
 @router.post("/analyze", response_model=MessageAnalysisResponse)
 async def analyze_messages(request: MessageAnalysisRequest):
     """
@@ -318,19 +382,55 @@ async def reanalyze_tasks(request: ReanalyzeRequest, db: Session = Depends(get_d
         'text': t.clean_text,
         'clean_text': t.clean_text,
         'raw_text': t.raw_text,
-        'category': t.category.value if t.category else 'other'
+        'category': t.category or 'other'
     } for t in tasks]
 
-    print(f"[REANALYZE] Starting reanalysis of {len(tasks)} tasks...")
+    # Reuse earlier AI verdicts for tasks whose analyzed fields haven't changed
+    cache_keys = {
+        t['id']: reanalysis_key(t['clean_text'], t['raw_text'], t['category'])
+        for t in task_dicts
+    }
+    cached = {
+        entry.text_hash: orjson.loads(entry.result_json)
+        for entry in db.execute(
+            select(ReanalysisCache).where(
+                ReanalysisCache.text_hash.in_(set(cache_keys.values())),
+                ReanalysisCache.created_at >= datetime.utcnow() - REANALYSIS_CACHE_TTL,
+            )
+        ).scalars()
+    }
 
-    # Call AI to reanalyze
-    improved_tasks = await AIService.reanalyze_tasks(task_dicts)
-
-    # Build lookup of improvements
     improvement_lookup = {}
-    for imp_task in improved_tasks:
-        if 'id' in imp_task:
+    uncached_tasks = []
+    for t in task_dicts:
+        hit = cached.get(cache_keys[t['id']])
+        if hit is not None:
+            improvement_lookup[t['id']] = {**t, **{k: v for k, v in hit.items() if v is not None}}
+        else:
+            uncached_tasks.append(t)
+
+    logger.info("Starting reanalysis of %d tasks (%d cached)...", len(tasks), len(improvement_lookup))
+
+    if uncached_tasks:
+        # Call AI to reanalyze
+        improved_tasks = await AIService.reanalyze_tasks(uncached_tasks)
+
+        # Build lookup of improvements, remembering real AI verdicts
+        new_entries = {}
+        for imp_task in improved_tasks:
+            if 'id' not in imp_task:
+                continue
             improvement_lookup[imp_task['id']] = imp_task
+            key = cache_keys.get(imp_task['id'])
+            if key and not imp_task.get('ai_error'):
+                new_entries[key] = orjson.dumps({
+                    'is_valid': imp_task.get('is_valid', True),
+                    'clean_text': imp_task.get('clean_text'),
+                    'category': imp_task.get('category'),
+                    'reason': imp_task.get('reason'),
+                }).decode()
+        if new_entries:
+            db.execute(upsert_reanalysis_results(db.get_bind().dialect.name, new_entries))
 
     results = []
     improved_count = 0
@@ -339,7 +439,7 @@ async def reanalyze_tasks(request: ReanalyzeRequest, db: Session = Depends(get_d
 
     for task in tasks:
         old_text = task.clean_text
-        old_category = task.category.value if task.category else 'other'
+        old_category = task.category or 'other'
 
         if task.id in improvement_lookup:
             imp = improvement_lookup[task.id]
@@ -361,16 +461,16 @@ async def reanalyze_tasks(request: ReanalyzeRequest, db: Session = Depends(get_d
                 # Apply improvements
                 new_text = imp.get('clean_text', old_text)
                 new_category = imp.get('category', old_category)
+                if not isinstance(new_category, str):
+                    new_category = old_category
 
                 if new_text != old_text or new_category != old_category:
                     # Track the improvement
                     task.add_improvement(old_text, new_text, "AI re-analysis")
                     task.clean_text = new_text
 
-                    try:
-                        task.category = TaskCategory(new_category)
-                    except ValueError:
-                        pass  # Keep original category
+                    # Keep original category if the AI returned an unknown one
+                    task.category = enum_by_value(CATEGORY_BY_VALUE, new_category, task.category)
 
                     improved_count += 1
                     results.append(ReanalyzeResult(
@@ -402,7 +502,7 @@ async def reanalyze_tasks(request: ReanalyzeRequest, db: Session = Depends(get_d
 
     db.commit()
 
-    print(f"[REANALYZE] Complete: {improved_count} improved, {removed_count} removed, {unchanged_count} unchanged")
+    logger.info("Reanalysis complete: %d improved, %d removed, %d unchanged", improved_count, removed_count, unchanged_count)
 
     return ReanalyzeResponse(
         improved_count=improved_count,
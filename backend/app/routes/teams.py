@@ -3,23 +3,36 @@ Teams Integration Routes
 
 Endpoints for fetching and processing Microsoft Teams mentions.
 """
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from functools import lru_cache
+from typing import AsyncIterator, Iterable, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 import secrets
-import httpx
 from urllib.parse import quote
-
-from app.services.teams_service import teams_service, TeamsMention, TeamsServiceError
+from cachetools import TTLCache
+
+from app.services.teams_service import (
+    teams_service,
+    TeamsMention,
+    TeamsServiceError,
+    apply_mention_filters,
+    iter_filtered_mentions,
+)
+from app.services.oauth_state_store import OAUTH_STATE_TTL, OAuthStateStore, get_oauth_state_store
 from app.core.config import settings
+from app.core.log import get_logger
 
 
 router = APIRouter(prefix="/teams", tags=["teams"])
+logger = get_logger("teams")
 
 
 class MentionResponse(BaseModel):
     """Response model for a single Teams mention."""
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     message_text: str
     sender_name: str
@@ -37,7 +50,7 @@ class MentionResponse(BaseModel):
     requested_at: Optional[datetime] = None
     graph_metadata: Optional[dict] = None
     # Status field
-    status: Optional[str] = "Open"
+    status: str = "Open"
 
 
 class MentionsResponse(BaseModel):
@@ -48,12 +61,38 @@ class MentionsResponse(BaseModel):
     message: Optional[str] = None
 
 
+def _json_response(model: BaseModel) -> Response:
+    """
+    Serialize a response model straight to JSON.
+
+    Skips FastAPI re-validating the returned model and dumping it to a dict
+    for the response class; response_model still documents the shape.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+async def _ndjson_mentions(mentions: Iterable[TeamsMention]) -> AsyncIterator[bytes]:
+    """Yield each mention as one line of NDJSON, converting as it goes."""
+    for m in mentions:
+        yield MentionResponse.model_validate(m).model_dump_json().encode() + b"\n"
+
+
+def _to_response_list(mentions: List[TeamsMention]) -> List[MentionResponse]:
+    """Convert TeamsMention objects to response format."""
+    return [MentionResponse.model_validate(m) for m in mentions]
+
+
 class TeamsStatusResponse(BaseModel):
     """Response model for Teams integration status."""
     is_configured: bool
     message: str
 
 
+# Serialized /mentions/demo responses by query params. Bounded so that
+# enumerating filter permutations can't grow it without limit.
+_demo_mentions_cache = TTLCache(maxsize=512, ttl=300)
+
+
 @router.get("/status", response_model=TeamsStatusResponse)
 async def get_teams_status():
     """
@@ -61,6 +100,12 @@ async def get_teams_status():
 
     Returns configuration status and helpful message.
     """
+    return _teams_status()
+
+
+@lru_cache(maxsize=1)
+def _teams_status() -> TeamsStatusResponse:
+    """Build the status response once; credentials are fixed at startup."""
     is_configured = teams_service.is_configured
 
     if is_configured:
@@ -94,51 +139,27 @@ async def get_mentions(
     try:
         mentions = await teams_service.get_my_mentions(limit=limit)
 
-        # Convert TeamsMention objects to response format
-        mention_responses = [
-            MentionResponse(
-                id=m.id,
-                message_text=m.message_text,
-                sender_name=m.sender_name,
-                sender_email=m.sender_email,
-                chat_name=m.chat_name,
-                channel_name=m.channel_name,
-                team_name=m.team_name,
-                timestamp=m.timestamp,
-                web_url=m.web_url,
-                is_from_channel=m.is_from_channel,
-                chat_type=m.chat_type,
-                chat_id=m.chat_id,
-                requested_by=m.requested_by,
-                requested_at=m.requested_at,
-                graph_metadata=m.graph_metadata,
-            )
-            for m in mentions
-        ]
+        mention_responses = _to_response_list(mentions)
 
         is_mock = not teams_service.is_configured
 
-        return MentionsResponse(
+        return _json_response(MentionsResponse(
             mentions=mention_responses,
             count=len(mention_responses),
             is_mock_data=is_mock,
             message="Using mock data for demo - configure Graph API credentials for real data" if is_mock else None,
-        )
+        ))
 
     except TeamsServiceError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        print(f"[TEAMS API] Error: {e}")
+        logger.error("Error fetching mentions: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to fetch Teams mentions. Please try again later."
         )
 
 
-# In-memory store for OAuth state (in production, use Redis or database)
-_oauth_states = {}
-
-
 class AuthUrlResponse(BaseModel):
     """Response model for OAuth auth URL."""
     auth_url: str
@@ -158,25 +179,13 @@ class TokenResponse(BaseModel):
     token_type: str
 
 
-@router.get("/auth/url", response_model=AuthUrlResponse)
-async def get_auth_url():
+@lru_cache(maxsize=1)
+def _auth_url_prefix() -> str:
     """
-    Generate Microsoft OAuth authorization URL for user to sign in.
+    Build the authorization URL up to its per-request state parameter.
 
-    This initiates the OAuth flow by returning a URL that the frontend
-    should redirect the user to for Microsoft sign-in.
+    Everything before state comes from settings, so it is encoded once.
     """
-    if not teams_service.is_configured:
-        raise HTTPException(
-            status_code=503,
-            detail="Teams integration not configured. Please set MS_GRAPH_CLIENT_ID, MS_GRAPH_CLIENT_SECRET, and MS_GRAPH_TENANT_ID."
-        )
-
-    # Generate random state for CSRF protection
-    state = secrets.token_urlsafe(32)
-    _oauth_states[state] = True
-
-    # Build authorization URL
     # Using only User.Read which never requires admin consent
     scopes = [
         "User.Read",
@@ -187,7 +196,7 @@ async def get_auth_url():
 
     # Use tenant-specific endpoint for single-tenant app
     # Add prompt=login to force fresh auth and bypass cached consent
-    auth_url = (
+    return (
         f"https://login.microsoftonline.com/{settings.MS_GRAPH_TENANT_ID}/oauth2/v2.0/authorize?"
         f"client_id={settings.MS_GRAPH_CLIENT_ID}&"
         f"response_type=code&"
@@ -195,32 +204,52 @@ async def get_auth_url():
         f"response_mode=query&"
         f"scope={quote(scope_string, safe='')}&"
         f"prompt=login&"
-        f"state={state}"
+        f"state="
     )
 
+
+@router.get("/auth/url", response_model=AuthUrlResponse)
+async def get_auth_url(store: OAuthStateStore = Depends(get_oauth_state_store)):
+    """
+    Generate Microsoft OAuth authorization URL for user to sign in.
+
+    This initiates the OAuth flow by returning a URL that the frontend
+    should redirect the user to for Microsoft sign-in.
+    """
+    if not teams_service.is_configured:
+        raise HTTPException(
+            status_code=503,
+            detail="Teams integration not configured. Please set MS_GRAPH_CLIENT_ID, MS_GRAPH_CLIENT_SECRET, and MS_GRAPH_TENANT_ID."
+        )
+
+    # Generate random state for CSRF protection (128 bits, hex-encoded)
+    state = secrets.token_bytes(16).hex()
+    await store.save(state, ttl=OAUTH_STATE_TTL)
+
+    auth_url = _auth_url_prefix() + state
+
     return AuthUrlResponse(auth_url=auth_url, state=state)
 
 
 @router.post("/auth/token", response_model=TokenResponse)
-async def exchange_token(request: TokenExchangeRequest):
+async def exchange_token(
+    request: TokenExchangeRequest,
+    store: OAuthStateStore = Depends(get_oauth_state_store),
+):
     """
     Exchange authorization code for access token.
 
     After user authorizes, frontend receives a code which this endpoint
     exchanges for an access token to make Graph API calls.
     """
-    import sys
-    print(f"[TEAMS] Token exchange request received - state: {request.state}, code: {request.code[:20]}...", file=sys.stderr, flush=True)
-    print(f"[TEAMS] Valid states in memory: {list(_oauth_states.keys())}", file=sys.stderr, flush=True)
+    # Only a prefix of the state is logged, and never the authorization code
+    logger.info("Token exchange request received - state: %s...", request.state[:8])
 
-    # Verify state to prevent CSRF
-    if request.state not in _oauth_states:
-        print(f"[TEAMS] State validation FAILED - state not found", file=sys.stderr, flush=True)
+    # Verify and consume state to prevent CSRF
+    if not await store.pop(request.state):
+        logger.warning("State validation failed - state %s... not found or expired", request.state[:8])
         raise HTTPException(status_code=400, detail="Invalid state parameter")
-
-    # Remove used state
-    print(f"[TEAMS] State validated successfully, removing from memory", file=sys.stderr, flush=True)
-    del _oauth_states[request.state]
+    logger.info("State validated successfully")
 
     if not teams_service.is_configured:
         raise HTTPException(
@@ -230,42 +259,41 @@ async def exchange_token(request: TokenExchangeRequest):
 
     # Exchange code for token - use tenant-specific endpoint
     token_url = f"https://login.microsoftonline.com/{settings.MS_GRAPH_TENANT_ID}/oauth2/v2.0/token"
-    print(f"[TEAMS] Exchanging code with Microsoft at: {token_url}", file=sys.stderr, flush=True)
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            token_url,
-            data={
-                "client_id": settings.MS_GRAPH_CLIENT_ID,
-                "client_secret": settings.MS_GRAPH_CLIENT_SECRET,
-                "code": request.code,
-                "redirect_uri": settings.MS_GRAPH_REDIRECT_URI,
-                "grant_type": "authorization_code",
-            },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
-
-        print(f"[TEAMS] Microsoft responded with status: {response.status_code}", file=sys.stderr, flush=True)
-
-        if response.status_code != 200:
-            error_data = response.json()
-            error_msg = error_data.get('error_description', 'Unknown error')
-            error_code = error_data.get('error', 'unknown')
-            print(f"[TEAMS] Token exchange failed: {error_code} - {error_msg}", file=sys.stderr, flush=True)
-            print(f"[TEAMS] Full error response: {error_data}", file=sys.stderr, flush=True)
-            raise HTTPException(
-                status_code=400,
-                detail=f"Failed to exchange token: {error_msg}"
-            )
+    logger.info("Exchanging code with Microsoft at: %s", token_url)
+
+    response = await teams_service.http_client.post(
+        token_url,
+        data={
+            "client_id": settings.MS_GRAPH_CLIENT_ID,
+            "client_secret": settings.MS_GRAPH_CLIENT_SECRET,
+            "code": request.code,
+            "redirect_uri": settings.MS_GRAPH_REDIRECT_URI,
+            "grant_type": "authorization_code",
+        },
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
 
-        token_data = response.json()
+    logger.info("Microsoft responded with status: %s", response.status_code)
 
-        return TokenResponse(
-            access_token=token_data["access_token"],
-            expires_in=token_data.get("expires_in", 3600),
-            token_type=token_data.get("token_type", "Bearer")
+    if response.status_code != 200:
+        error_data = response.json()
+        error_msg = error_data.get('error_description', 'Unknown error')
+        error_code = error_data.get('error', 'unknown')
+        logger.warning("Token exchange failed: %s - %s", error_code, error_msg)
+        logger.debug("Full error response: %s", error_data)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to exchange token: {error_msg}"
         )
 
+    token_data = response.json()
+
+    return TokenResponse(
+        access_token=token_data["access_token"],
+        expires_in=token_data.get("expires_in", 3600),
+        token_type=token_data.get("token_type", "Bearer")
+    )
+
 
 @router.get("/mentions/user", response_model=MentionsResponse)
 async def get_user_mentions(
@@ -274,7 +302,8 @@ async def get_user_mentions(
     users: Optional[str] = Query(None, description="Comma-separated list of user names to filter by"),
     group_chats: Optional[str] = Query(None, description="Comma-separated list of group chat names to filter by"),
     meeting_chats: Optional[str] = Query(None, description="Comma-separated list of meeting chat names to filter by"),
-    individual_chats: Optional[str] = Query(None, description="Comma-separated list of individual chat names to filter by")
+    individual_chats: Optional[str] = Query(None, description="Comma-separated list of individual chat names to filter by"),
+    stream: bool = Query(default=False, description="Stream mentions as NDJSON (one mention per line) instead of a JSON object")
 ):
     """
     Fetch Teams messages where the authenticated user is @mentioned using their access token.
@@ -289,6 +318,8 @@ async def get_user_mentions(
         group_chats: Optional comma-separated list of group chat names
         meeting_chats: Optional comma-separated list of meeting chat names
         individual_chats: Optional comma-separated list of individual chat names
+        stream: Stream matching mentions as NDJSON, filtering and converting in
+            one pass without building the full response
 
     Returns:
         MentionsResponse containing list of mentions with metadata
@@ -296,74 +327,27 @@ async def get_user_mentions(
     try:
         mentions = await teams_service.get_my_mentions_with_token(access_token, limit=limit)
 
-        # Apply filters if provided
-        if users or group_chats or meeting_chats or individual_chats:
-            user_list = [u.strip() for u in users.split(",")] if users else []
-            group_list = [g.strip() for g in group_chats.split(",")] if group_chats else []
-            meeting_list = [m.strip() for m in meeting_chats.split(",")] if meeting_chats else []
-            individual_list = [i.strip() for i in individual_chats.split(",")] if individual_chats else []
-
-            filtered_mentions = []
-            for m in mentions:
-                # Filter by user
-                if user_list and m.sender_name not in user_list:
-                    continue
-
-                # Filter by chat type and name
-                if m.chat_type == "group" and group_list:
-                    if m.chat_name not in group_list and (not m.is_from_channel or f"{m.team_name}/{m.channel_name}" not in group_list):
-                        continue
-                elif m.chat_type == "meeting" and meeting_list:
-                    if m.chat_name not in meeting_list:
-                        continue
-                elif m.chat_type == "individual" and individual_list:
-                    if m.chat_name not in individual_list:
-                        continue
-
-                # If chat type specific filters exist but this doesn't match any, skip
-                if (group_list and m.chat_type != "group") and \
-                   (meeting_list and m.chat_type != "meeting") and \
-                   (individual_list and m.chat_type != "individual"):
-                    if group_list or meeting_list or individual_list:
-                        continue
-
-                filtered_mentions.append(m)
-
-            mentions = filtered_mentions
-
-        # Convert TeamsMention objects to response format
-        mention_responses = [
-            MentionResponse(
-                id=m.id,
-                message_text=m.message_text,
-                sender_name=m.sender_name,
-                sender_email=m.sender_email,
-                chat_name=m.chat_name,
-                channel_name=m.channel_name,
-                team_name=m.team_name,
-                timestamp=m.timestamp,
-                web_url=m.web_url,
-                is_from_channel=m.is_from_channel,
-                chat_type=m.chat_type,
-                chat_id=m.chat_id,
-                requested_by=m.requested_by,
-                requested_at=m.requested_at,
-                graph_metadata=m.graph_metadata,
+        if stream:
+            return StreamingResponse(
+                _ndjson_mentions(iter_filtered_mentions(mentions, users, group_chats, meeting_chats, individual_chats)),
+                media_type="application/x-ndjson",
             )
-            for m in mentions
-        ]
 
-        return MentionsResponse(
+        mentions = apply_mention_filters(mentions, users, group_chats, meeting_chats, individual_chats)
+
+        mention_responses = _to_response_list(mentions)
+
+        return _json_response(MentionsResponse(
             mentions=mention_responses,
             count=len(mention_responses),
             is_mock_data=False,
             message=None,
-        )
+        ))
 
     except TeamsServiceError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        print(f"[TEAMS API] Error: {e}")
+        logger.error("Error fetching mentions: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to fetch Teams mentions. Please try again later."
@@ -395,60 +379,28 @@ async def get_demo_mentions(
     Returns:
         MentionsResponse containing mock mentions with metadata
     """
+    cache_key = (limit, users, group_chats, meeting_chats, individual_chats)
+    content = _demo_mentions_cache.get(cache_key)
+    if content is None:
+        content = _build_demo_mentions(*cache_key).model_dump_json().encode()
+        _demo_mentions_cache[cache_key] = content
+
+    return Response(content=content, media_type="application/json")
+
+
+def _build_demo_mentions(
+    limit: int,
+    users: Optional[str],
+    group_chats: Optional[str],
+    meeting_chats: Optional[str],
+    individual_chats: Optional[str],
+) -> MentionsResponse:
     # Get mock mentions from the service
     mentions = teams_service._get_mock_mentions(limit=limit)
 
-    # Apply filters if provided
-    if users or group_chats or meeting_chats or individual_chats:
-        user_list = [u.strip() for u in users.split(",")] if users else []
-        group_list = [g.strip() for g in group_chats.split(",")] if group_chats else []
-        meeting_list = [m.strip() for m in meeting_chats.split(",")] if meeting_chats else []
-        individual_list = [i.strip() for i in individual_chats.split(",")] if individual_chats else []
-
-        filtered_mentions = []
-        for m in mentions:
-            # Filter by user
-            if user_list and m.sender_name not in user_list:
-                continue
-
-            # Filter by chat type and name
-            if m.chat_type == "group" and group_list:
-                if m.chat_name not in group_list and (not m.is_from_channel or f"{m.team_name}/{m.channel_name}" not in group_list):
-                    continue
-            elif m.chat_type == "meeting" and meeting_list:
-                if m.chat_name not in meeting_list:
-                    continue
-            elif m.chat_type == "individual" and individual_list:
-                if m.chat_name not in individual_list:
-                    continue
-
-            # If chat type specific filters exist but this doesn't match any, skip
-            if (group_list and m.chat_type != "group") and \
-               (meeting_list and m.chat_type != "meeting") and \
-               (individual_list and m.chat_type != "individual"):
-                if group_list or meeting_list or individual_list:
-                    continue
-
-            filtered_mentions.append(m)
-
-        mentions = filtered_mentions
-
-    # Convert TeamsMention objects to response format
-    mention_responses = [
-        MentionResponse(
-            id=m.id,
-            message_text=m.message_text,
-            sender_name=m.sender_name,
-            sender_email=m.sender_email,
-            chat_name=m.chat_name,
-            channel_name=m.channel_name,
-            team_name=m.team_name,
-            timestamp=m.timestamp,
-            web_url=m.web_url,
-            is_from_channel=m.is_from_channel,
-        )
-        for m in mentions
-    ]
+    mentions = apply_mention_filters(mentions, users, group_chats, meeting_chats, individual_chats)
+
+    mention_responses = _to_response_list(mentions)
 
     return MentionsResponse(
         mentions=mention_responses,
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.models.task import TaskCategory
 
 
@@ -8,7 +8,7 @@ class GraphNode(BaseModel):
     label: str
     category: TaskCategory
     time: str | None = None
-    dependsOn: List[str] = []
+    dependsOn: List[str] = Field(default_factory=list)
     # Additional fields for task detail modal
     raw_text: Optional[str] = None
     original_message: Optional[str] = None
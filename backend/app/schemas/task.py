@@ -1,16 +1,34 @@
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, field_validator
-from app.models.task import TaskCategory, TaskStatus, TaskPriority, Task
+from typing import Any, Optional, List, Mapping
+from pydantic import BaseModel, Field, field_validator
+from app.models.task import (
+    CATEGORY_BY_VALUE,
+    PRIORITY_BY_VALUE,
+    TaskCategory,
+    TaskStatus,
+    TaskPriority,
+    Task,
+    decode_json_list,
+)
+
+
+def _ai_category(v) -> TaskCategory:
+    """Map an AI-supplied category string onto TaskCategory, defaulting to OTHER."""
+    return CATEGORY_BY_VALUE.get(v.strip().lower(), TaskCategory.OTHER) if isinstance(v, str) else TaskCategory.OTHER
+
+
+def _ai_priority(v) -> TaskPriority:
+    """Map an AI-supplied priority string onto TaskPriority, defaulting to MEDIUM."""
+    return PRIORITY_BY_VALUE.get(v.strip().lower(), TaskPriority.MEDIUM) if isinstance(v, str) else TaskPriority.MEDIUM
 
 
 class TaskCreate(BaseModel):
     raw_text: str
     category: Optional[TaskCategory] = None
-    status: Optional[TaskStatus] = TaskStatus.TODO
-    priority: Optional[TaskPriority] = TaskPriority.MEDIUM
+    status: TaskStatus = TaskStatus.TODO
+    priority: TaskPriority = TaskPriority.MEDIUM
     due_at: Optional[datetime] = None
-    depends_on: List[int] = []
+    depends_on: List[int] = Field(default_factory=list)
     original_message: Optional[str] = None
     jira_ticket: Optional[str] = None
     assigned_to: Optional[str] = None
@@ -60,58 +78,67 @@ class TaskResponse(BaseModel):
     assigned_to: Optional[str] = None
     due_at: Optional[datetime] = None
     was_improved: bool = False
-    improvement_history: List[ImprovementRecord] = []
+    improvement_history: List[ImprovementRecord] = Field(default_factory=list)
     created_at: datetime
     updated_at: datetime
-    reminders: List[ReminderInTask] = []
-    depends_on: List[int] = []
+    reminders: List[ReminderInTask] = Field(default_factory=list)
+    depends_on: List[int] = Field(default_factory=list)
 
     class Config:
         from_attributes = True
 
-    @field_validator('depends_on', mode='before')
+    @field_validator('depends_on', 'improvement_history', mode='before')
     @classmethod
-    def parse_depends_on(cls, v):
-        if isinstance(v, str):
-            import json
-            try:
-                return json.loads(v)
-            except (json.JSONDecodeError, TypeError):
-                return []
+    def parse_json_list(cls, v):
+        """Accept the raw JSON column text as well as an already-decoded list."""
+        if isinstance(v, (str, bytes)):
+            return decode_json_list(v)
         return v or []
 
-    @field_validator('improvement_history', mode='before')
-    @classmethod
-    def parse_improvement_history(cls, v):
-        if isinstance(v, str):
-            import json
-            try:
-                return json.loads(v)
-            except (json.JSONDecodeError, TypeError):
-                return []
-        return v or []
 
-    @classmethod
-    def from_task(cls, task: Task) -> "TaskResponse":
-        return cls(
-            id=task.id,
-            user_id=task.user_id,
-            raw_text=task.raw_text,
-            clean_text=task.clean_text,
-            original_message=task.original_message,
-            category=task.category,
-            status=task.status or TaskStatus.TODO,
-            priority=task.priority or TaskPriority.MEDIUM,
-            jira_ticket=task.jira_ticket,
-            assigned_to=task.assigned_to,
-            due_at=task.due_at,
-            was_improved=task.was_improved or False,
-            improvement_history=task.improvement_history or [],
-            created_at=task.created_at,
-            updated_at=task.updated_at,
-            reminders=[ReminderInTask.model_validate(r) for r in task.reminders],
-            depends_on=task.depends_on,
-        )
+def task_row_content(row: Mapping[str, Any], reminders: List[dict]) -> dict:
+    """Serialize a Core select() row of Task columns in TaskResponse's shape.
+
+    Used by the task endpoints to hand plain dicts straight to orjson,
+    which encodes datetimes and str enums natively, instead of constructing,
+    validating and dumping a TaskResponse per row. Keep the keys in sync with
+    TaskResponse, which still documents the endpoints' schema.
+    """
+    return {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "raw_text": row["raw_text"],
+        "clean_text": row["clean_text"],
+        "original_message": row["original_message"],
+        "category": row["category"],
+        "status": row["status"] or TaskStatus.TODO.value,
+        "priority": row["priority"] or TaskPriority.MEDIUM.value,
+        "jira_ticket": row["jira_ticket"],
+        "assigned_to": row["assigned_to"],
+        "due_at": row["due_at"],
+        "was_improved": row["was_improved"] or False,
+        "improvement_history": [
+            {
+                "timestamp": record.get("timestamp"),
+                "old_text": record.get("old_text"),
+                "new_text": record.get("new_text"),
+                "reason": record.get("reason"),
+            }
+            for record in decode_json_list(row["improvement_history_json"])
+        ],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "reminders": reminders,
+        "depends_on": decode_json_list(row["depends_on_json"]),
+    }
+
+
+def task_content(task: Task) -> dict:
+    """Serialize a persisted Task (with its reminders) like task_row_content."""
+    return task_row_content(
+        {column.key: getattr(task, column.key) for column in Task.__table__.columns},
+        [{"id": r.id, "remind_at": r.remind_at, "status": r.status} for r in task.reminders],
+    )
 
 
 class TaskParseRequest(BaseModel):
@@ -138,19 +165,26 @@ class DeployChecklist(BaseModel):
     items: List[str]
 
 
+class TaskSuggestions(BaseModel):
+    """Every suggestion for a task, generated in a single AI call."""
+    message: MessageSuggestion
+    email: EmailSuggestion
+    deploy_checklist: DeployChecklist
+
+
 # Message Analysis schemas
 class TeamMemberProfile(BaseModel):
     name: str
-    nicknames: List[str] = []
+    nicknames: List[str] = Field(default_factory=list)
     role: Optional[str] = None
 
 
 class UserProfileInput(BaseModel):
     name: str
-    nicknames: List[str] = []
+    nicknames: List[str] = Field(default_factory=list)
     role: str = ""
-    teamMembers: List[TeamMemberProfile] = []
-    reportsTo: List[str] = []
+    teamMembers: List[TeamMemberProfile] = Field(default_factory=list)
+    reportsTo: List[str] = Field(default_factory=list)
     tonePreference: str = "friendly"
 
 
@@ -162,19 +196,35 @@ class MessageAnalysisRequest(BaseModel):
 class ImprovedMessage(BaseModel):
     original: str
     improved: str
-    category: str
+    category: TaskCategory
+
+    @field_validator('category', mode='before')
+    @classmethod
+    def parse_category(cls, v):
+        return _ai_category(v)
 
 
 class ExtractedTask(BaseModel):
     text: str
     original_text: Optional[str] = None
-    category: str
+    category: TaskCategory
     assigned_to: str
     due_date: Optional[str] = None
-    priority: str = "medium"
+    priority: TaskPriority = TaskPriority.MEDIUM
     is_valid: bool = True
     jira_ticket: Optional[str] = None
 
+    # AI output isn't held to the enums; unknown values fall back to defaults
+    @field_validator('category', mode='before')
+    @classmethod
+    def parse_category(cls, v):
+        return _ai_category(v)
+
+    @field_validator('priority', mode='before')
+    @classmethod
+    def parse_priority(cls, v):
+        return _ai_priority(v)
+
 
 class MessageAnalysisResponse(BaseModel):
     relevant_to_user: bool
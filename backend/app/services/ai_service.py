@@ -1,20 +1,134 @@
+import asyncio
+import copy
+import hashlib
 import json
 import re
-import google.generativeai as genai
-from typing import Optional, List
+import string
+from functools import lru_cache
+from typing import AsyncIterator, Optional, List
+import orjson
+from cachetools import TTLCache
 from app.core.config import settings
+from app.core.log import get_logger
 from app.models.task import TaskCategory
 
-# Configure the API
-genai.configure(api_key=settings.GOOGLE_API_KEY)
+logger = get_logger("ai")
 
-# Use Gemini 2.5 Flash for fast responses
-model = genai.GenerativeModel('gemini-2.5-flash')
+# Gemini model, created on first use. The SDK takes around half a second to
+# import, so loading it lazily keeps it off the server's startup path.
+_model = None
+
+
+def get_model():
+    """Return the shared Gemini model, configuring the SDK on first call."""
+    global _model
+    if _model is None:
+        import google.generativeai as genai
+
+        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        # Use Gemini 2.5 Flash for fast responses
+        _model = genai.GenerativeModel('gemini-2.5-flash')
+    return _model
+
+
+async def stream_response_text(prompt: str) -> AsyncIterator[str]:
+    """Yield Gemini's reply to prompt in chunks, without blocking the event loop."""
+    response = await get_model().generate_content_async(prompt, stream=True)
+    async for chunk in response:
+        yield chunk.text
+
+
+def strip_code_fence(text: str) -> str:
+    """
+    Strip a reply and drop the markdown code fence around it, if any.
+
+    Same result as removing the first and last lines of a fenced reply,
+    but by slicing between the outer newlines instead of splitting.
+    """
+    text = text.strip()
+    if not text.startswith("```"):
+        return text
+    first_nl = text.find("\n")
+    last_nl = text.rfind("\n")
+    if first_nl == last_nl:
+        return ""
+    return text[first_nl + 1:last_nl]
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Tasks per reanalysis prompt, and how many prompts may be in flight at once
+# (kept low for the API's rate limits)
+REANALYZE_CHUNK_SIZE = 20
+REANALYZE_CONCURRENCY = 4
+
+# Bump whenever a cached prompt's wording changes, so stale answers are
+# never served for the new prompt
+PROMPT_VERSION = "2"
+
+# Successful Gemini results for repeated inputs (re-pasted digests, the same
+# standup message); errors are never cached
+_ai_result_cache = TTLCache(maxsize=10000, ttl=86400)
+
+
+def ai_cache_key(kind: str, text: str) -> str:
+    """Hash the prompt version, prompt kind and variable prompt input."""
+    payload = "\x00".join((PROMPT_VERSION, kind, text))
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def get_cached_result(key: str):
+    """Return a copy of a cached result (callers mutate them), or None."""
+    cached = _ai_result_cache.get(key)
+    return copy.deepcopy(cached) if cached is not None else None
+
+
+def cache_result(key: str, result) -> None:
+    _ai_result_cache[key] = copy.deepcopy(result)
+
+
+async def stream_json_array(prompt: str) -> AsyncIterator:
+    """
+    Yield each element of the JSON array in Gemini's reply as soon as it is complete.
+
+    Anything before the opening bracket (such as a markdown code fence) is
+    skipped. Raises ValueError if the reply ends before the array closes.
+    """
+    buffer = ""
+    pos = -1  # Index of the next unparsed character, once '[' is found
+    async for text in stream_response_text(prompt):
+        buffer += text
+        if pos < 0:
+            start = buffer.find('[')
+            if start < 0:
+                continue
+            pos = start + 1
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos == len(buffer):
+                break
+            if buffer[pos] == ']':
+                return
+            try:
+                item, end = _JSON_DECODER.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Element is still arriving
+            if buffer[pos] not in '{["' and (end == len(buffer) or buffer[end] not in ' \t\r\n,]'):
+                # A bare number may be cut off mid-token ("-4.5" of "-4.5e2"),
+                # so it only counts once a delimiter follows it
+                break
+            yield item
+            pos = end
+
+    raise ValueError("Gemini response ended before the JSON array was closed")
 
 
 # Task validation constants
 MIN_TASK_LENGTH = 15  # Minimum characters for a valid task (increased from 10)
 MIN_WORD_COUNT = 3    # Minimum words for a valid task
+VALIDATION_CACHE_SIZE = 4096  # Distinct task strings memoized by the validators
 
 # Comprehensive noise patterns - aggressively filter garbage
 NOISE_PATTERNS = [
@@ -70,182 +184,227 @@ ACTION_INDICATORS = [
     '@', 'sujay', 'suji',  # User mentions
 ]
 
+# Compiled once at import; the validators run these for every candidate task.
+# Each pattern list is fused into one alternation, so a single match() call
+# tries every pattern at the start of the text (each keeps its own anchors).
+NOISE_REGEX = re.compile('|'.join(f'(?:{p})' for p in NOISE_PATTERNS), re.IGNORECASE)
+NON_ACTIONABLE_REGEX = re.compile('|'.join(f'(?:{p})' for p in NON_ACTIONABLE_PATTERNS), re.IGNORECASE)
+# Action verbs are looked up per word: \w+ tokens split on exactly the \b
+# boundaries a whole-word regex would use, and a set probe per token beats
+# trying a 70-way alternation at every character offset
+ACTION_VERB_SET = frozenset(ACTION_VERBS)
+WORD_PATTERN = re.compile(r'\w+')
+FILENAME_PATTERN = re.compile(
+    r'.*\.(mp4|mp3|pdf|doc|docx|xls|xlsx|ppt|pptx|png|jpg|jpeg|gif|zip|rar|txt|csv|json|xml|html|css|js|ts|py|java|cpp|c|h|md|yml|yaml)$',
+    re.IGNORECASE,
+)
+URL_ONLY_PATTERN = re.compile(r'^https?://\S+$')
+BARE_JIRA_PATTERN = re.compile(r'^[A-Z]+-\d+\s*$')
+JIRA_TICKET_PATTERN = re.compile(r'\b([A-Z]{2,10}-\d+)\b')
+# Bullet/bracket junk plus every character str.isspace() accepts (the same
+# set as re's \s), so a str.strip() removes exactly what [\s\-•*→)([\]]+
+# anchored at either end would
+JUNK_CHARS = (
+    '-•*→)([]'
+    '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004'
+    '\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000'
+)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+LIST_NUMBER_PATTERN = re.compile(r'^\d+[\.\)\]]\s*')
+ASCII_LETTERS = string.ascii_letters.encode()
+
+
+def count_alpha(text: str) -> int:
+    """Count alphabetic characters, matching sum(c.isalpha() for c in text)."""
+    if text.isascii():
+        # For ASCII, isalpha() is exactly ascii_letters; bytes.translate
+        # deletes them in C and the shrinkage is the letter count
+        return len(text) - len(text.encode('ascii').translate(None, ASCII_LETTERS))
+    return sum(1 for c in text if c.isalpha())
+
+
+DEFAULT_DEPLOY_CHECKLIST = (
+    "Review and test all changes locally",
+    "Run full test suite",
+    "Create deployment tag",
+    "Deploy to staging",
+    "Verify staging deployment",
+    "Deploy to production",
+    "Monitor logs and metrics",
+    "Notify team of completion",
+)
+
+
+def fallback_message(task_text: str) -> str:
+    """Message suggestion used when Gemini is unavailable."""
+    return f"Hey! Quick note about: {task_text[:50]}..."
+
+
+def fallback_email(task_text: str) -> tuple[str, str]:
+    """Email (subject, body) suggestion used when Gemini is unavailable."""
+    return f"Regarding: {task_text[:40]}", f"Hi,\n\nI'm reaching out about: {task_text}\n\nBest regards"
+
+
+def _is_noise(stripped: str, lower: str) -> bool:
+    """is_noise() for text that is already stripped, with its lowercase form."""
+    # Cheap scalar checks first; most rejects never reach the regexes
+
+    # Too short (character count)
+    if len(stripped) < MIN_TASK_LENGTH:
+        return True
 
-class TaskValidator:
-    """Validates and filters tasks to ensure quality - STRICT MODE."""
+    # Too few words
+    words = stripped.split()
+    if len(words) < MIN_WORD_COUNT:
+        return True
 
-    @staticmethod
-    def is_noise(text: str) -> bool:
-        """Check if text is noise/garbage that shouldn't be a task."""
-        if not text:
-            return True
+    # Check if it's mostly special characters
+    alpha_count = count_alpha(stripped)
+    if alpha_count < len(stripped) * 0.4:  # Less than 40% alphabetic
+        return True
+
+    # Check against noise patterns
+    if NOISE_REGEX.match(stripped):
+        return True
 
-        text_stripped = text.strip()
-        text_lower = text_stripped.lower()
+    # Check non-actionable patterns
+    if NON_ACTIONABLE_REGEX.match(lower):
+        return True
 
-        # Check against noise patterns
-        for pattern in NOISE_PATTERNS:
-            if re.match(pattern, text_stripped, re.IGNORECASE):
-                return True
+    return False
 
-        # Check non-actionable patterns
-        for pattern in NON_ACTIONABLE_PATTERNS:
-            if re.match(pattern, text_lower, re.IGNORECASE):
-                return True
 
-        # Too short (character count)
-        if len(text_stripped) < MIN_TASK_LENGTH:
-            return True
+def _has_action_verb(lower: str) -> bool:
+    """has_action_verb() for already-lowercased text."""
+    return not ACTION_VERB_SET.isdisjoint(WORD_PATTERN.findall(lower))
 
-        # Too few words
-        words = text_stripped.split()
-        if len(words) < MIN_WORD_COUNT:
-            return True
 
-        # Check if it's mostly special characters
-        alpha_count = sum(1 for c in text_stripped if c.isalpha())
-        if alpha_count < len(text_stripped) * 0.4:  # Less than 40% alphabetic
+def _has_action_indicator(lower: str) -> bool:
+    """has_action_indicator() for already-lowercased text."""
+    for indicator in ACTION_INDICATORS:
+        if indicator in lower:
             return True
+    return False
 
-        return False
 
-    @staticmethod
-    def is_filename(text: str) -> bool:
-        """Check if text is a filename."""
-        # Common file extensions
-        file_pattern = r'.*\.(mp4|mp3|pdf|doc|docx|xls|xlsx|ppt|pptx|png|jpg|jpeg|gif|zip|rar|txt|csv|json|xml|html|css|js|ts|py|java|cpp|c|h|md|yml|yaml)$'
-        return bool(re.match(file_pattern, text.strip(), re.IGNORECASE))
+def is_noise(text: str) -> bool:
+    """Check if text is noise/garbage that shouldn't be a task."""
+    if not text:
+        return True
 
-    @staticmethod
-    def is_url_only(text: str) -> bool:
-        """Check if text is just a URL without context."""
-        text = text.strip()
-        # Check if entire text is just a URL
-        url_pattern = r'^https?://\S+$'
-        return bool(re.match(url_pattern, text))
+    text_stripped = text.strip()
+    return _is_noise(text_stripped, text_stripped.lower())
 
-    @staticmethod
-    def has_action_verb(text: str) -> bool:
-        """Check if the text contains an action verb."""
-        text_lower = text.lower()
-        # Check for action verbs as whole words
-        for verb in ACTION_VERBS:
-            if re.search(rf'\b{verb}\b', text_lower):
-                return True
-        return False
 
-    @staticmethod
-    def has_action_indicator(text: str) -> bool:
-        """Check if text has indicators that make it actionable."""
-        text_lower = text.lower()
-        for indicator in ACTION_INDICATORS:
-            if indicator in text_lower:
-                return True
-        return False
+def is_filename(text: str) -> bool:
+    """Check if text is a filename."""
+    # Common file extensions
+    return bool(FILENAME_PATTERN.match(text.strip()))
 
-    @staticmethod
-    def is_meaningful_task(task_text: str, original_text: str = "") -> bool:
-        """
-        Determine if a task is meaningful and actionable.
-        Returns True only if the task passes ALL validation checks.
-        VERY STRICT - err on the side of filtering out.
-        """
-        if not task_text:
-            return False
 
-        # Run all noise checks
-        if TaskValidator.is_noise(task_text):
-            return False
+def is_url_only(text: str) -> bool:
+    """Check if text is just a URL without context."""
+    text = text.strip()
+    # Check if entire text is just a URL
+    return bool(URL_ONLY_PATTERN.match(text))
 
-        # Check for filenames
-        if TaskValidator.is_filename(task_text):
-            return False
 
-        # Check for URL-only
-        if TaskValidator.is_url_only(task_text):
-            return False
+def has_action_verb(text: str) -> bool:
+    """Check if the text contains an action verb."""
+    # Check for action verbs as whole words
+    return _has_action_verb(text.lower())
 
-        # Must have some action or be clearly actionable
-        has_action = TaskValidator.has_action_verb(task_text)
-        has_indicator = TaskValidator.has_action_indicator(task_text)
 
-        if not has_action and not has_indicator:
-            return False
+def has_action_indicator(text: str) -> bool:
+    """Check if text has indicators that make it actionable."""
+    return _has_action_indicator(text.lower())
 
-        # Bare Jira tickets without context are not valid
-        if re.match(r'^[A-Z]+-\d+\s*$', task_text.strip()):
-            return False
 
-        # Jira ticket with minimal context should still pass
-        # e.g., "Review CLPB-1234" is valid but "CLPB-1234" alone is not
+@lru_cache(maxsize=VALIDATION_CACHE_SIZE)
+def is_meaningful_task(task_text: str) -> bool:
+    """
+    Determine if a task is meaningful and actionable.
+    Returns True only if the task passes ALL validation checks.
+    VERY STRICT - err on the side of filtering out.
+    Pure function of the text, so results are cached for re-submitted messages.
+    """
+    if not task_text:
+        return False
 
-        return True
+    # Strip and lowercase once; every check below works on these forms
+    stripped = task_text.strip()
+    lower = stripped.lower()
 
-    @staticmethod
-    def clean_task_text(text: str) -> str:
-        """Clean up task text by removing formatting artifacts."""
-        if not text:
-            return ""
+    # Run all noise checks
+    if _is_noise(stripped, lower):
+        return False
 
-        # Remove leading/trailing punctuation and whitespace
-        text = re.sub(r'^[\s\-\•\*\→\)\(\[\]]+', '', text)
-        text = re.sub(r'[\s\-\•\*\→\)\(\[\]]+$', '', text)
+    # Check for filenames
+    if FILENAME_PATTERN.match(stripped):
+        return False
 
-        # Remove duplicate whitespace
-        text = re.sub(r'\s+', ' ', text)
+    # Check for URL-only
+    if URL_ONLY_PATTERN.match(stripped):
+        return False
 
-        # Remove leading numbers with periods/brackets (list formatting)
-        text = re.sub(r'^\d+[\.\)\]]\s*', '', text)
+    # Must have some action or be clearly actionable
+    if not _has_action_verb(lower) and not _has_action_indicator(lower):
+        return False
 
-        return text.strip()
+    # Bare Jira tickets without context are not valid
+    if BARE_JIRA_PATTERN.match(stripped):
+        return False
 
-    @staticmethod
-    def extract_jira_tickets(text: str) -> List[str]:
-        """Extract Jira ticket IDs from text."""
-        pattern = r'\b([A-Z]{2,10}-\d+)\b'
-        return re.findall(pattern, text)
+    # Jira ticket with minimal context should still pass
+    # e.g., "Review CLPB-1234" is valid but "CLPB-1234" alone is not
 
+    return True
 
-class AIService:
-    """AI-powered task analysis service using Google Gemini."""
 
-    @classmethod
-    async def analyze_tasks(cls, tasks_text: list[str]) -> list[dict]:
-        """
-        Analyze multiple tasks and return classification, time, dependencies, and REWRITTEN text.
-        Uses strict validation to filter out meaningless tasks.
-        EVERY valid task MUST be rewritten into a clear, professional sentence.
-        """
-        if not tasks_text:
-            return []
+@lru_cache(maxsize=VALIDATION_CACHE_SIZE)
+def clean_task_text(text: str) -> str:
+    """Clean up task text by removing formatting artifacts."""
+    if not text:
+        return ""
 
-        # Pre-filter obvious noise (but keep original indices for mapping)
-        filtered_tasks = []
-        original_indices = []
-        for i, task in enumerate(tasks_text):
-            cleaned = TaskValidator.clean_task_text(task)
-            if TaskValidator.is_meaningful_task(cleaned, task):
-                filtered_tasks.append(cleaned)
-                original_indices.append(i)
-            else:
-                print(f"[PRE-FILTER] Skipping noise: '{task[:50]}...'")
+    # Remove leading/trailing punctuation and whitespace
+    text = text.strip(JUNK_CHARS)
 
-        if not filtered_tasks:
-            return [{
-                "category": "other",
-                "time": None,
-                "depends_on_indices": [],
-                "is_valid": False,
-                "reason": "No meaningful tasks found"
-            } for _ in tasks_text]
+    # Remove duplicate whitespace
+    text = WHITESPACE_PATTERN.sub(' ', text)
+
+    # Remove leading numbers with periods/brackets (list formatting)
+    text = LIST_NUMBER_PATTERN.sub('', text)
+
+    return text.strip()
 
-        # Build numbered task list for the prompt
-        numbered_tasks = "\n".join([f"{i+1}. {task}" for i, task in enumerate(filtered_tasks)])
 
-        prompt = f"""You are a SENIOR NLP ENGINEER. Analyze these tasks and for each valid one, REWRITE it into a clear, professional sentence.
+def extract_jira_tickets(text: str) -> List[str]:
+    """Extract Jira ticket IDs from text."""
+    return JIRA_TICKET_PATTERN.findall(text)
 
-TASKS TO ANALYZE:
-{numbered_tasks}
+
+class TaskValidator:
+    """
+    Validates and filters tasks to ensure quality - STRICT MODE.
+
+    Namespace over the module-level validation functions, kept for existing
+    callers; code in this module calls the functions directly.
+    """
+    is_noise = staticmethod(is_noise)
+    is_filename = staticmethod(is_filename)
+    is_url_only = staticmethod(is_url_only)
+    has_action_verb = staticmethod(has_action_verb)
+    has_action_indicator = staticmethod(has_action_indicator)
+    is_meaningful_task = staticmethod(is_meaningful_task)
+    clean_task_text = staticmethod(clean_task_text)
+    extract_jira_tickets = staticmethod(extract_jira_tickets)
+
+
+# Static prompt instructions. The per-call input goes after them, so every
+# request shares one long identical prefix that Gemini's implicit prompt
+# caching can reuse instead of re-processing the rules each time.
+ANALYZE_TASKS_INSTRUCTIONS = """You are a SENIOR NLP ENGINEER. Analyze the tasks listed at the end and for each valid one, REWRITE it into a clear, professional sentence.
 
 ═══════════════════════════════════════════════════════
 STRICT VALIDATION - A task is INVALID if:
@@ -301,192 +460,16 @@ FOR EACH TASK RETURN:
 
 Return ONLY valid JSON array:
 [
-  {{"category": "deploy", "time": null, "depends_on_indices": [], "is_valid": true, "improved_text": "Review the pull request and deploy the update to production.", "priority": "medium"}},
-  {{"category": "other", "time": null, "depends_on_indices": [], "is_valid": false, "reason": "Filename, not a task"}}
+  {"category": "deploy", "time": null, "depends_on_indices": [], "is_valid": true, "improved_text": "Review the pull request and deploy the update to production.", "priority": "medium"},
+  {"category": "other", "time": null, "depends_on_indices": [], "is_valid": false, "reason": "Filename, not a task"}
 ]"""
 
-        try:
-            response = model.generate_content(prompt)
-            response_text = response.text.strip()
-
-            # Clean up markdown code blocks
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1])
-
-            ai_results = json.loads(response_text)
-
-            # Map back to original indices and fill in gaps
-            result = []
-            ai_result_idx = 0
-            for i, task in enumerate(tasks_text):
-                if i in original_indices:
-                    if ai_result_idx < len(ai_results):
-                        ai_result = ai_results[ai_result_idx]
-
-                        # Additional validation on improved_text
-                        if ai_result.get('is_valid', False):
-                            improved = ai_result.get('improved_text', '')
-                            if improved and TaskValidator.is_meaningful_task(improved, task):
-                                result.append(ai_result)
-                            else:
-                                # If improved text fails validation, mark as invalid
-                                ai_result['is_valid'] = False
-                                ai_result['reason'] = 'Improved text failed validation'
-                                result.append(ai_result)
-                        else:
-                            result.append(ai_result)
-
-                        ai_result_idx += 1
-                    else:
-                        result.append({
-                            "category": "other",
-                            "time": None,
-                            "depends_on_indices": [],
-                            "is_valid": False,
-                            "reason": "AI did not return result"
-                        })
-                else:
-                    result.append({
-                        "category": "other",
-                        "time": None,
-                        "depends_on_indices": [],
-                        "is_valid": False,
-                        "reason": "Filtered as noise in pre-processing"
-                    })
-
-            print(f"[AI] Analysis complete: {sum(1 for r in result if r.get('is_valid', False))} valid out of {len(result)}")
-            return result
-
-        except Exception as e:
-            print(f"[AI] Error analyzing tasks: {e}")
-            return [{
-                "category": "other",
-                "time": None,
-                "depends_on_indices": [],
-                "is_valid": False,
-                "reason": f"AI analysis error: {str(e)}"
-            } for _ in tasks_text]
-
-    @classmethod
-    async def suggest_message(cls, task_text: str) -> str:
-        """Generate a suggested short message/DM for a task."""
-        prompt = f"""Generate a short, friendly Slack/Teams message for this task.
-Keep it casual, professional, and under 100 words.
-
-Task: {task_text}
-
-Return ONLY the message text, no quotes or explanation."""
-
-        try:
-            response = model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            print(f"[AI] Error generating message: {e}")
-            return f"Hey! Quick note about: {task_text[:50]}..."
-
-    @classmethod
-    async def suggest_email(cls, task_text: str) -> tuple[str, str]:
-        """Generate a suggested email subject and body."""
-        prompt = f"""Generate a professional email for this task.
-
-Task: {task_text}
-
-Return a JSON object with "subject" and "body" fields.
-The body should be professional but not overly formal.
-Include placeholders like [Name] or [Details] where appropriate.
-
-Return ONLY valid JSON, no other text. Example:
-{{"subject": "Subject here", "body": "Email body here"}}"""
-
-        try:
-            response = model.generate_content(prompt)
-            response_text = response.text.strip()
-
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1])
-
-            result = json.loads(response_text)
-            return result.get("subject", "Regarding your request"), result.get("body", "")
-        except Exception as e:
-            print(f"[AI] Error generating email: {e}")
-            return f"Regarding: {task_text[:40]}", f"Hi,\n\nI'm reaching out about: {task_text}\n\nBest regards"
-
-    @classmethod
-    async def suggest_deploy_checklist(cls, task_text: str) -> list[str]:
-        """Generate a deployment checklist based on the task."""
-        prompt = f"""Generate a deployment checklist for this task.
-
-Task: {task_text}
-
-Create a practical, ordered checklist of 8-12 items covering:
-- Pre-deployment checks
-- Deployment steps
-- Post-deployment verification
-
-Return ONLY a JSON array of strings, no other text. Example:
-["Step 1", "Step 2", "Step 3"]"""
-
-        try:
-            response = model.generate_content(prompt)
-            response_text = response.text.strip()
-
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1])
-
-            result = json.loads(response_text)
-            return result if isinstance(result, list) else []
-        except Exception as e:
-            print(f"[AI] Error generating checklist: {e}")
-            return [
-                "Review and test all changes locally",
-                "Run full test suite",
-                "Create deployment tag",
-                "Deploy to staging",
-                "Verify staging deployment",
-                "Deploy to production",
-                "Monitor logs and metrics",
-                "Notify team of completion"
-            ]
-
-    @classmethod
-    async def analyze_messages(cls, raw_text: str, user_profile: dict) -> dict:
-        """
-        Intelligently analyze messy messages and extract ONLY meaningful, actionable tasks.
-        EVERY task MUST be rewritten by AI into a clear, professional sentence.
-        Groups related messages into cohesive tasks.
-        Uses strict validation to prevent garbage tasks.
-        """
-        user_names = [user_profile.get('name', '')] + user_profile.get('nicknames', [])
-        team_members = user_profile.get('teamMembers', [])
-        reports_to = user_profile.get('reportsTo', [])
-        tone = user_profile.get('tonePreference', 'friendly')
-
-        # Build team context
-        team_context = ""
-        if team_members:
-            team_names = [m.get('name', '') for m in team_members]
-            team_context = f"\nTeam members: {', '.join(team_names)}"
-        if reports_to:
-            team_context += f"\nReports to: {', '.join(reports_to)}"
-
-        prompt = f"""You are a SENIOR NLP ENGINEER specializing in task extraction. Your CRITICAL job is to:
+ANALYZE_MESSAGES_INSTRUCTIONS = """You are a SENIOR NLP ENGINEER specializing in task extraction. Your CRITICAL job, for the message at the end, is to:
 1. Extract ONLY meaningful, actionable tasks relevant to the user
 2. REWRITE every task into a clear, professional, action-oriented sentence
 3. GROUP related messages into single cohesive tasks
 4. NEVER output raw/messy text - always rewrite
 
-USER CONTEXT:
-User's names/nicknames: {', '.join(user_names) if user_names else 'Sujay, Suji'}
-Tone preference: {tone}{team_context}
-
-MESSAGE TO ANALYZE:
-\"\"\"
-{raw_text}
-\"\"\"
-
 ═══════════════════════════════════════════════════════
 CRITICAL RULES - WHAT TO IGNORE (NEVER CREATE TASKS FOR):
 ═══════════════════════════════════════════════════════
@@ -574,18 +557,18 @@ PRIORITY:
 ═══════════════════════════════════════════════════════
 OUTPUT FORMAT (strict JSON):
 ═══════════════════════════════════════════════════════
-{{
+{
   "relevant_to_user": true/false,
   "summary": "Brief 1-2 sentence summary of actionable items found",
   "improved_messages": [
-    {{
+    {
       "original": "Original messy text from input",
-      "improved": "Clean, {tone} professional rewrite of the message",
+      "improved": "Clean, professional rewrite of the message in the user's tone preference",
       "category": "message"
-    }}
+    }
   ],
   "tasks": [
-    {{
+    {
       "text": "REWRITTEN clear, actionable task (15+ chars, action verb, complete sentence)",
       "original_text": "The original raw text this came from",
       "category": "deploy|message|jira_update|reminder|email|other",
@@ -594,9 +577,9 @@ OUTPUT FORMAT (strict JSON):
       "priority": "high|medium|low",
       "is_valid": true,
       "jira_ticket": "TICKET-123 or null"
-    }}
+    }
   ]
-}}
+}
 
 ═══════════════════════════════════════════════════════
 FINAL CHECKS BEFORE OUTPUT:
@@ -610,15 +593,273 @@ FINAL CHECKS BEFORE OUTPUT:
 
 If NO meaningful tasks found, return empty tasks array. NEVER fabricate tasks."""
 
+
+class AIService:
+    """AI-powered task analysis service using Google Gemini."""
+
+    @classmethod
+    async def analyze_tasks(cls, tasks_text: list[str]) -> list[dict]:
+        """
+        Analyze multiple tasks and return classification, time, dependencies, and REWRITTEN text.
+        Uses strict validation to filter out meaningless tasks.
+        EVERY valid task MUST be rewritten into a clear, professional sentence.
+        """
+        if not tasks_text:
+            return []
+
+        # Pre-filter obvious noise and send each distinct task only once,
+        # remembering which prompt position every input maps to
+        unique_tasks: dict[str, int] = {}
+        prompt_positions: dict[int, int] = {}
+        for i, task in enumerate(tasks_text):
+            cleaned = clean_task_text(task)
+            if is_meaningful_task(cleaned):
+                prompt_positions[i] = unique_tasks.setdefault(cleaned, len(unique_tasks))
+            else:
+                logger.debug("Pre-filter skipping noise: '%s...'", task[:50])
+
+        if not unique_tasks:
+            return [{
+                "category": "other",
+                "time": None,
+                "depends_on_indices": [],
+                "is_valid": False,
+                "reason": "No meaningful tasks found"
+            } for _ in tasks_text]
+
+        # Build numbered task list for the prompt
+        numbered_tasks = "\n".join([f"{i+1}. {task}" for i, task in enumerate(unique_tasks)])
+
+        # The whole batch is the key: depends_on_indices refer to positions
+        # within it, so per-task results can't be mixed across batches
+        cache_key = ai_cache_key("analyze_tasks", numbered_tasks)
+
+        prompt = f"{ANALYZE_TASKS_INSTRUCTIONS}\n\nTASKS TO ANALYZE:\n{numbered_tasks}"
+
+        try:
+            ai_results = get_cached_result(cache_key)
+            if ai_results is not None:
+                logger.info("Analysis served from cache (%d results)", len(ai_results))
+            else:
+                # Validate each result as it streams in rather than after the
+                # whole array has been generated
+                ai_results = []
+                async for ai_result in stream_json_array(prompt):
+                    # Additional validation on improved_text
+                    if ai_result.get('is_valid', False):
+                        improved = ai_result.get('improved_text', '')
+                        if not (improved and is_meaningful_task(improved)):
+                            # If improved text fails validation, mark as invalid
+                            ai_result['is_valid'] = False
+                            ai_result['reason'] = 'Improved text failed validation'
+                    ai_results.append(ai_result)
+                cache_result(cache_key, ai_results)
+
+            # The AI numbers dependencies by prompt position; callers index
+            # tasks_text, so point each at the first input sent in that slot
+            input_numbers: dict[int, int] = {}
+            for i, position in prompt_positions.items():
+                input_numbers.setdefault(position + 1, i + 1)
+
+            # Map back to original indices and fill in gaps
+            result = []
+            for i in range(len(tasks_text)):
+                position = prompt_positions.get(i)
+                if position is None:
+                    result.append({
+                        "category": "other",
+                        "time": None,
+                        "depends_on_indices": [],
+                        "is_valid": False,
+                        "reason": "Filtered as noise in pre-processing"
+                    })
+                elif position < len(ai_results):
+                    # Copied so duplicates of one task don't share a dict
+                    ai_result = dict(ai_results[position])
+                    depends_on = ai_result.get('depends_on_indices')
+                    if isinstance(depends_on, list):
+                        ai_result['depends_on_indices'] = [
+                            input_numbers[dep] for dep in depends_on
+                            if isinstance(dep, int) and dep in input_numbers
+                        ]
+                    result.append(ai_result)
+                else:
+                    result.append({
+                        "category": "other",
+                        "time": None,
+                        "depends_on_indices": [],
+                        "is_valid": False,
+                        "reason": "AI did not return result"
+                    })
+
+            logger.info("Analysis complete: %d valid out of %d", sum(1 for r in result if r.get('is_valid', False)), len(result))
+            return result
+
+        except Exception as e:
+            logger.error("Error analyzing tasks: %s", e)
+            return [{
+                "category": "other",
+                "time": None,
+                "depends_on_indices": [],
+                "is_valid": False,
+                "reason": f"AI analysis error: {str(e)}"
+            } for _ in tasks_text]
+
+    @classmethod
+    async def suggest_message(cls, task_text: str) -> str:
+        """Generate a suggested short message/DM for a task."""
+        prompt = f"""Generate a short, friendly Slack/Teams message for this task.
+Keep it casual, professional, and under 100 words.
+
+Task: {task_text}
+
+Return ONLY the message text, no quotes or explanation."""
+
         try:
-            response = model.generate_content(prompt)
-            response_text = response.text.strip()
+            response = get_model().generate_content(prompt)
+            return response.text.strip()
+        except Exception as e:
+            logger.error("Error generating message: %s", e)
+            return fallback_message(task_text)
 
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1])
+    @classmethod
+    async def suggest_email(cls, task_text: str) -> tuple[str, str]:
+        """Generate a suggested email subject and body."""
+        prompt = f"""Generate a professional email for this task.
 
-            result = json.loads(response_text)
+Task: {task_text}
+
+Return a JSON object with "subject" and "body" fields.
+The body should be professional but not overly formal.
+Include placeholders like [Name] or [Details] where appropriate.
+
+Return ONLY valid JSON, no other text. Example:
+{{"subject": "Subject here", "body": "Email body here"}}"""
+
+        try:
+            response = get_model().generate_content(prompt)
+            response_text = strip_code_fence(response.text)
+
+            result = orjson.loads(response_text)
+            return result.get("subject", "Regarding your request"), result.get("body", "")
+        except Exception as e:
+            logger.error("Error generating email: %s", e)
+            return fallback_email(task_text)
+
+    @classmethod
+    async def suggest_deploy_checklist(cls, task_text: str) -> list[str]:
+        """Generate a deployment checklist based on the task."""
+        prompt = f"""Generate a deployment checklist for this task.
+
+Task: {task_text}
+
+Create a practical, ordered checklist of 8-12 items covering:
+- Pre-deployment checks
+- Deployment steps
+- Post-deployment verification
+
+Return ONLY a JSON array of strings, no other text. Example:
+["Step 1", "Step 2", "Step 3"]"""
+
+        try:
+            response = get_model().generate_content(prompt)
+            response_text = strip_code_fence(response.text)
+
+            result = orjson.loads(response_text)
+            return result if isinstance(result, list) else []
+        except Exception as e:
+            logger.error("Error generating checklist: %s", e)
+            return list(DEFAULT_DEPLOY_CHECKLIST)
+
+    @classmethod
+    async def bundle_suggestions(cls, task_text: str) -> dict:
+        """
+        Generate the message, email and deploy checklist suggestions in one call.
+
+        One round-trip instead of three when a client wants every suggestion
+        for a task. Returns a dict with "message", "email_subject", "email_body"
+        and "checklist"; any field the model leaves out gets the same fallback
+        the single-suggestion methods use.
+        """
+        prompt = f"""Generate suggestions for this task.
+
+Task: {task_text}
+
+Return a JSON object with:
+- "message": a short, friendly Slack/Teams message, casual, professional and under 100 words
+- "email_subject" and "email_body": a professional email that is not overly formal,
+  with placeholders like [Name] or [Details] where appropriate
+- "checklist": a practical, ordered deployment checklist of 8-12 strings covering
+  pre-deployment checks, deployment steps and post-deployment verification
+
+Return ONLY valid JSON, no other text. Example:
+{{"message": "Hey!...", "email_subject": "Subject here", "email_body": "Email body here", "checklist": ["Step 1", "Step 2"]}}"""
+
+        try:
+            response_text = strip_code_fence("".join([text async for text in stream_response_text(prompt)]))
+
+            result = orjson.loads(response_text)
+            if not isinstance(result, dict):
+                result = {}
+        except Exception as e:
+            logger.error("Error generating suggestions: %s", e)
+            result = {}
+
+        subject, body = fallback_email(task_text)
+        checklist = result.get("checklist")
+        return {
+            "message": result.get("message") or fallback_message(task_text),
+            "email_subject": result.get("email_subject") or subject,
+            "email_body": result.get("email_body") or body,
+            "checklist": checklist if isinstance(checklist, list) else list(DEFAULT_DEPLOY_CHECKLIST),
+        }
+
+    @classmethod
+    async def analyze_messages(cls, raw_text: str, user_profile: dict) -> dict:
+        """
+        Intelligently analyze messy messages and extract ONLY meaningful, actionable tasks.
+        EVERY task MUST be rewritten by AI into a clear, professional sentence.
+        Groups related messages into cohesive tasks.
+        Uses strict validation to prevent garbage tasks.
+        """
+        cache_key = ai_cache_key(
+            "analyze_messages",
+            raw_text + "\x00" + json.dumps(user_profile, sort_keys=True, default=str),
+        )
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            logger.info("Message analysis served from cache")
+            return cached
+
+        user_names = [user_profile.get('name', '')] + user_profile.get('nicknames', [])
+        team_members = user_profile.get('teamMembers', [])
+        reports_to = user_profile.get('reportsTo', [])
+        tone = user_profile.get('tonePreference', 'friendly')
+
+        # Build team context
+        team_context = ""
+        if team_members:
+            team_names = [m.get('name', '') for m in team_members]
+            team_context = f"\nTeam members: {', '.join(team_names)}"
+        if reports_to:
+            team_context += f"\nReports to: {', '.join(reports_to)}"
+
+        prompt = f"""{ANALYZE_MESSAGES_INSTRUCTIONS}
+
+USER CONTEXT:
+User's names/nicknames: {', '.join(user_names) if user_names else 'Sujay, Suji'}
+Tone preference: {tone}{team_context}
+
+MESSAGE TO ANALYZE:
+\"\"\"
+{raw_text}
+\"\"\"
+"""
+
+        try:
+            response_text = strip_code_fence("".join([text async for text in stream_response_text(prompt)]))
+
+            result = orjson.loads(response_text)
 
             # Post-process: strict validation and filtering
             if 'tasks' in result:
@@ -628,28 +869,29 @@ If NO meaningful tasks found, return empty tasks array. NEVER fabricate tasks.""
 
                     # Skip if AI marked as invalid
                     if not task.get('is_valid', True):
-                        print(f"[FILTER] AI marked as invalid: '{task_text[:50]}...'")
+                        logger.debug("AI marked as invalid: '%s...'", task_text[:50])
                         continue
 
                     # Skip if fails our validation
-                    if not TaskValidator.is_meaningful_task(task_text, task.get('original_text', '')):
-                        print(f"[FILTER] Failed validation: '{task_text[:50]}...'")
+                    if not is_meaningful_task(task_text):
+                        logger.debug("Failed validation: '%s...'", task_text[:50])
                         continue
 
                     # Clean up the task text
-                    task['text'] = TaskValidator.clean_task_text(task_text)
+                    task['text'] = clean_task_text(task_text)
 
                     # Ensure task is marked valid
                     task['is_valid'] = True
                     valid_tasks.append(task)
 
                 result['tasks'] = valid_tasks
-                print(f"[AI] Extracted {len(valid_tasks)} valid tasks from message")
+                logger.info("Extracted %d valid tasks from message", len(valid_tasks))
 
+            cache_result(cache_key, result)
             return result
 
         except Exception as e:
-            print(f"[AI] Error analyzing messages: {e}")
+            logger.error("Error analyzing messages: %s", e)
             return {
                 "relevant_to_user": True,
                 "summary": "Unable to analyze message. Please try again.",
@@ -668,6 +910,23 @@ If NO meaningful tasks found, return empty tasks array. NEVER fabricate tasks.""
         if not tasks:
             return []
 
+        # Chunks go to Gemini concurrently, so a large list isn't one long
+        # reply, and a malformed reply only falls back for its own chunk
+        semaphore = asyncio.Semaphore(REANALYZE_CONCURRENCY)
+
+        async def reanalyze_chunk(chunk: list[dict]) -> list[dict]:
+            async with semaphore:
+                return await cls._reanalyze_chunk(chunk)
+
+        chunk_results = await asyncio.gather(*(
+            reanalyze_chunk(tasks[start:start + REANALYZE_CHUNK_SIZE])
+            for start in range(0, len(tasks), REANALYZE_CHUNK_SIZE)
+        ))
+        return [task for chunk_result in chunk_results for task in chunk_result]
+
+    @classmethod
+    async def _reanalyze_chunk(cls, tasks: list[dict]) -> list[dict]:
+        """Reanalyze one chunk of tasks in a single Gemini call."""
         # Build task list for analysis
         task_descriptions = []
         for i, task in enumerate(tasks):
@@ -678,11 +937,13 @@ If NO meaningful tasks found, return empty tasks array. NEVER fabricate tasks.""
             desc += f"\n   ID: {task.get('id', 'unknown')}"
             task_descriptions.append(desc)
 
+        current_tasks = "\n".join(task_descriptions)
+
         prompt = f"""You are a SENIOR NLP ENGINEER. Review these existing tasks and IMPROVE them.
 Your goal is to make every task a clear, professional, actionable sentence.
 
 CURRENT TASKS:
-{chr(10).join(task_descriptions)}
+{current_tasks}
 
 ═══════════════════════════════════════════════════════
 YOUR JOB - IN ORDER OF PRIORITY:
@@ -746,58 +1007,68 @@ Return JSON array:
 
 IMPORTANT: For valid tasks, improved_text is MANDATORY and must be a complete rewritten sentence."""
 
-        try:
-            response = model.generate_content(prompt)
-            response_text = response.text.strip()
-
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1])
+        # The prompt is a pure function of the task list, so a re-submitted
+        # list reuses Gemini's parsed answer; validation still runs below
+        cache_key = ai_cache_key("reanalyze_tasks", current_tasks)
 
-            improvements = json.loads(response_text)
-
-            # Apply improvements to original tasks
+        try:
             improved_tasks = []
-            for improvement in improvements:
-                idx = improvement.get('original_index', -1)
-                if idx >= 0 and idx < len(tasks):
-                    original_task = tasks[idx].copy()
-
-                    if improvement.get('is_valid', False):
-                        improved_text = improvement.get('improved_text', '')
-
-                        # Validate the improved text
-                        if improved_text and TaskValidator.is_meaningful_task(improved_text, original_task.get('raw_text', '')):
-                            original_task['clean_text'] = improved_text
-                            if improvement.get('category'):
-                                original_task['category'] = improvement['category']
-                            original_task['was_improved'] = True
-                            original_task['is_valid'] = True
-                            improved_tasks.append(original_task)
-                        else:
-                            # Improved text failed validation - mark as invalid
-                            original_task['is_valid'] = False
-                            original_task['reason'] = 'Improved text failed validation'
-                            improved_tasks.append(original_task)
-                    else:
-                        # Task marked as invalid by AI
-                        original_task['is_valid'] = False
-                        original_task['reason'] = improvement.get('reason', 'Identified as noise')
-                        improved_tasks.append(original_task)
-
-            print(f"[REANALYZE] Processed {len(improved_tasks)} tasks, {sum(1 for t in improved_tasks if t.get('is_valid', False))} valid")
+            improvements = get_cached_result(cache_key)
+            if improvements is not None:
+                logger.info("Reanalysis served from cache")
+                for improvement in improvements:
+                    cls._apply_improvement(tasks, improvement, improved_tasks)
+            else:
+                # Apply each improvement as it streams in rather than after
+                # the whole array has been generated
+                improvements = []
+                async for improvement in stream_json_array(prompt):
+                    improvements.append(improvement)
+                    cls._apply_improvement(tasks, improvement, improved_tasks)
+                cache_result(cache_key, improvements)
+
+            logger.info("Reanalysis processed %d tasks, %d valid", len(improved_tasks), sum(1 for t in improved_tasks if t.get('is_valid', False)))
             return improved_tasks
 
         except Exception as e:
-            print(f"[AI] Error reanalyzing tasks: {e}")
+            logger.error("Error reanalyzing tasks: %s", e)
             # On error, return original tasks with validation applied
             for task in tasks:
-                task['is_valid'] = TaskValidator.is_meaningful_task(
-                    task.get('clean_text', task.get('text', '')),
-                    task.get('raw_text', '')
+                task['is_valid'] = is_meaningful_task(
+                    task.get('clean_text', task.get('text', ''))
                 )
+                task['ai_error'] = True  # Not an AI verdict, so callers shouldn't cache it
             return tasks
 
+    @staticmethod
+    def _apply_improvement(tasks: list[dict], improvement: dict, improved_tasks: list[dict]):
+        """Append the reanalyzed copy of the task an improvement refers to."""
+        idx = improvement.get('original_index', -1)
+        if idx >= 0 and idx < len(tasks):
+            original_task = tasks[idx].copy()
+
+            if improvement.get('is_valid', False):
+                improved_text = improvement.get('improved_text', '')
+
+                # Validate the improved text
+                if improved_text and is_meaningful_task(improved_text):
+                    original_task['clean_text'] = improved_text
+                    if improvement.get('category'):
+                        original_task['category'] = improvement['category']
+                    original_task['was_improved'] = True
+                    original_task['is_valid'] = True
+                    improved_tasks.append(original_task)
+                else:
+                    # Improved text failed validation - mark as invalid
+                    original_task['is_valid'] = False
+                    original_task['reason'] = 'Improved text failed validation'
+                    improved_tasks.append(original_task)
+            else:
+                # Task marked as invalid by AI
+                original_task['is_valid'] = False
+                original_task['reason'] = improvement.get('reason', 'Identified as noise')
+                improved_tasks.append(original_task)
+
     @classmethod
     async def detect_dependencies(cls, tasks: list[dict]) -> list[list[int]]:
         """
@@ -827,15 +1098,19 @@ Example: {{"2": [1], "3": [1, 2], "4": []}}
 
 Return ONLY valid JSON, no other text."""
 
-        try:
-            response = model.generate_content(prompt)
-            response_text = response.text.strip()
+        cache_key = ai_cache_key("detect_dependencies", task_descriptions)
 
-            if response_text.startswith("```"):
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1])
+        try:
+            result = get_cached_result(cache_key)
+            from_cache = result is not None
+            if from_cache:
+                logger.info("Dependency detection served from cache")
+            else:
+                # A single JSON object, so it is only parsed once complete;
+                # streaming keeps the event loop free while it generates
+                response_text = strip_code_fence("".join([text async for text in stream_response_text(prompt)]))
 
-            result = json.loads(response_text)
+                result = orjson.loads(response_text)
 
             # Convert to list format matching task order
             dependencies = []
@@ -844,7 +1119,10 @@ Return ONLY valid JSON, no other text."""
                 deps = result.get(task_id, [])
                 dependencies.append([int(d) for d in deps if str(d) != task_id])
 
+            if not from_cache:
+                cache_result(cache_key, result)
+
             return dependencies
         except Exception as e:
-            print(f"[AI] Error detecting dependencies: {e}")
+            logger.error("Error detecting dependencies: %s", e)
             return [[] for _ in tasks]
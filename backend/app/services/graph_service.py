@@ -1,9 +1,27 @@
 import re
-from typing import List
+import threading
+from collections import Counter
+from typing import Dict, FrozenSet, List, Set, Tuple
+from cachetools import LRUCache
 from app.models.task import Task, TaskCategory
 from app.schemas.graph import GraphNode, GraphEdge, GraphResponse
 from app.services.task_classifier import TaskClassifier
 
+# Words of 4+ characters, the keyword-overlap unit
+KEYWORD_PATTERN = re.compile(r'\b\w{4,}\b')
+
+# Common words that don't count towards keyword overlap
+KEYWORD_STOPWORDS = frozenset({
+    'this', 'that', 'with', 'from', 'have', 'been', 'will', 'would', 'could', 'should',
+})
+
+# Per-task keyword sets, in task order, and word -> positions of tasks using it
+KeywordIndex = Tuple[List[FrozenSet[str]], Dict[str, List[int]]]
+
+# Distinct task lists whose graphs are kept; the frontend re-polls /graph
+# with an unchanged list far more often than it edits tasks
+GRAPH_CACHE_SIZE = 32
+
 
 class GraphService:
     # Keywords that indicate dependencies
@@ -21,14 +39,59 @@ class GraphService:
         (r'then\s+', None),  # Sequential indicator
     ]
 
+    # Compiled once; the union answers "does any pattern match?" in one scan,
+    # so most tasks skip the per-pattern searches entirely. Matching tasks
+    # still try each pattern in list order, since that order decides which
+    # edge label survives de-duplication.
+    _COMPILED_DEPENDENCY_PATTERNS = [(re.compile(p), c) for p, c in DEPENDENCY_PATTERNS]
+    _ANY_DEPENDENCY_PATTERN = re.compile('|'.join(f'(?:{p})' for p, _ in DEPENDENCY_PATTERNS))
+
+    # Words that mark a task as waiting on another, matched anywhere in the
+    # text (as substrings); keyword overlap only links tasks that have one
+    _DEPENDENCY_CUE_PATTERN = re.compile('after|once|when|depends|blocked|waiting')
+
+    # Graphs by task-list signature. Keyed on content rather than cleared on
+    # writes, so any change to a task the graph reads is a miss. Responses
+    # are shared between hits and must not be mutated.
+    _graph_cache: LRUCache = LRUCache(maxsize=GRAPH_CACHE_SIZE)
+    _graph_cache_lock = threading.Lock()
+
     @classmethod
     def build_graph(cls, tasks: List[Task]) -> GraphResponse:
-        """Build a graph showing task dependencies."""
+        """Build a graph showing task dependencies, reusing it for an unchanged task list."""
+        signature = tuple(
+            (task.id, task.clean_text, task.raw_text, task.original_message, task.category,
+             task.due_at, task.depends_on_json, task.was_improved)
+            for task in tasks
+        )
+        with cls._graph_cache_lock:
+            graph = cls._graph_cache.get(signature)
+        if graph is None:
+            graph = cls._build_graph(tasks)
+            with cls._graph_cache_lock:
+                cls._graph_cache[signature] = graph
+        return graph
+
+    @classmethod
+    def _build_graph(cls, tasks: List[Task]) -> GraphResponse:
+        """Build a graph showing task dependencies.
+
+        Everything comes from persisted tasks, already validated on the way
+        in, so nodes and edges are built with model_construct to skip
+        re-validating every field.
+        """
         nodes = []
         edges = []
+        # (source, target) pairs already linked; the first edge between two
+        # tasks wins, so duplicates are never built
+        edge_keys: Set[Tuple[str, str]] = set()
 
-        # Create nodes for all tasks with time extraction
+        # One pass builds the nodes, the explicit depends_on edges and the
+        # category groups used by heuristic dependency detection
+        tasks_by_category = {}
         for task in tasks:
+            task_id = str(task.id)
+
             # Extract time from task text
             time_str = TaskClassifier.extract_time(task.clean_text)
 
@@ -39,8 +102,8 @@ class GraphService:
             # Get depends_on from task
             depends_on_list = [str(dep_id) for dep_id in task.depends_on]
 
-            nodes.append(GraphNode(
-                id=str(task.id),
+            nodes.append(GraphNode.model_construct(
+                id=task_id,
                 label=task.clean_text[:50] + ('...' if len(task.clean_text) > 50 else ''),
                 category=task.category,
                 time=time_str,
@@ -50,83 +113,100 @@ class GraphService:
                 was_improved=task.was_improved or False
             ))
 
-        # Create edges based on explicit depends_on relationships first
-        for task in tasks:
-            for dep_id in task.depends_on:
-                edges.append(GraphEdge(
-                    source=str(dep_id),
-                    target=str(task.id),
+            # Edges for explicit depends_on relationships come first
+            for dep_id in depends_on_list:
+                if (dep_id, task_id) in edge_keys:
+                    continue
+                edge_keys.add((dep_id, task_id))
+                edges.append(GraphEdge.model_construct(
+                    source=dep_id,
+                    target=task_id,
                     label="depends"
                 ))
 
-        # Group tasks by category for heuristic dependency detection
-        tasks_by_category = {}
-        for task in tasks:
-            if task.category not in tasks_by_category:
-                tasks_by_category[task.category] = []
-            tasks_by_category[task.category].append(task)
+            tasks_by_category.setdefault(task.category, []).append(task)
+
+        # Built on first use; most graphs never need keyword matching
+        keyword_index = None
 
         # Find additional dependencies from text analysis (only if no explicit depends_on)
-        for task in tasks:
+        for position, task in enumerate(tasks):
             if task.depends_on:  # Skip if already has explicit dependencies
                 continue
 
-            text_lower = task.clean_text.lower()
+            text_lower = task.clean_text_lower
+            if not cls._ANY_DEPENDENCY_PATTERN.search(text_lower):
+                continue
 
-            for pattern, dep_category in cls.DEPENDENCY_PATTERNS:
-                if re.search(pattern, text_lower):
+            for pattern, dep_category in cls._COMPILED_DEPENDENCY_PATTERNS:
+                if pattern.search(text_lower):
                     if dep_category and dep_category in tasks_by_category:
                         # Link to tasks of the specified category
                         for dep_task in tasks_by_category[dep_category]:
                             if dep_task.id != task.id:
-                                edges.append(GraphEdge(
-                                    source=str(dep_task.id),
-                                    target=str(task.id),
+                                edge_key = (str(dep_task.id), str(task.id))
+                                if edge_key in edge_keys:
+                                    continue
+                                edge_keys.add(edge_key)
+                                edges.append(GraphEdge.model_construct(
+                                    source=edge_key[0],
+                                    target=edge_key[1],
                                     label="blocks"
                                 ))
-                    elif dep_category is None:
+                    elif dep_category is None and cls._DEPENDENCY_CUE_PATTERN.search(text_lower):
                         # Try to find referenced task by keyword matching
-                        cls._find_keyword_dependencies(task, tasks, edges, text_lower)
+                        if keyword_index is None:
+                            keyword_index = cls._build_keyword_index(tasks)
+                        cls._find_keyword_dependencies(position, tasks, edges, edge_keys, keyword_index)
 
-        # Remove duplicate edges
-        seen_edges = set()
-        unique_edges = []
-        for edge in edges:
-            edge_key = (edge.source, edge.target)
-            if edge_key not in seen_edges:
-                seen_edges.add(edge_key)
-                unique_edges.append(edge)
+        return GraphResponse.model_construct(nodes=nodes, edges=edges)
 
-        return GraphResponse(nodes=nodes, edges=unique_edges)
+    @classmethod
+    def _build_keyword_index(cls, tasks: List[Task]) -> KeywordIndex:
+        """Tokenize every task once and index tasks by the keywords they use."""
+        task_words = []
+        postings: Dict[str, List[int]] = {}
+        for position, task in enumerate(tasks):
+            words = frozenset(KEYWORD_PATTERN.findall(task.clean_text_lower)) - KEYWORD_STOPWORDS
+            task_words.append(words)
+            for word in words:
+                postings.setdefault(word, []).append(position)
+        return task_words, postings
 
     @classmethod
     def _find_keyword_dependencies(
         cls,
-        task: Task,
+        position: int,
         all_tasks: List[Task],
         edges: List[GraphEdge],
-        text_lower: str
+        edge_keys: Set[Tuple[str, str]],
+        keyword_index: KeywordIndex
     ):
-        """Find dependencies based on keyword matching."""
-        # Extract potential task references
-        words = set(re.findall(r'\b\w{4,}\b', text_lower))
-
-        for other_task in all_tasks:
+        """Find dependencies based on keyword matching.
+
+        Only called for tasks whose text has a dependency cue word.
+        """
+        task = all_tasks[position]
+        task_words, postings = keyword_index
+
+        # Count shared keywords per other task from the posting lists, rather
+        # than re-tokenizing and intersecting against every task
+        common_counts = Counter()
+        for word in task_words[position]:
+            common_counts.update(postings[word])
+
+        # Check for significant word overlap, emitting edges in task order
+        for other_position in sorted(p for p, count in common_counts.items() if count >= 2):
+            other_task = all_tasks[other_position]
             if other_task.id == task.id:
                 continue
 
-            other_words = set(re.findall(r'\b\w{4,}\b', other_task.clean_text.lower()))
-
-            # Check for significant word overlap
-            common_words = words & other_words
-            # Filter out common words
-            common_words -= {'this', 'that', 'with', 'from', 'have', 'been', 'will', 'would', 'could', 'should'}
-
-            if len(common_words) >= 2:
-                # Check if this task mentions waiting/depending on something
-                if any(kw in text_lower for kw in ['after', 'once', 'when', 'depends', 'blocked', 'waiting']):
-                    edges.append(GraphEdge(
-                        source=str(other_task.id),
-                        target=str(task.id),
-                        label="related"
-                    ))
+            edge_key = (str(other_task.id), str(task.id))
+            if edge_key in edge_keys:
+                continue
+            edge_keys.add(edge_key)
+            edges.append(GraphEdge.model_construct(
+                source=edge_key[0],
+                target=edge_key[1],
+                label="related"
+            ))
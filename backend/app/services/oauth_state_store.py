@@ -0,0 +1,81 @@
+"""
+OAuth State Store
+
+Short-lived storage for the CSRF state tokens issued by the Teams OAuth flow.
+States are single-use: pop() validates and consumes a state in one step.
+"""
+import time
+from typing import Optional, Protocol
+
+from app.core.config import settings
+
+
+# How long a user has to complete Microsoft sign-in (seconds)
+OAUTH_STATE_TTL = 600
+
+
+class OAuthStateStore(Protocol):
+    async def save(self, state: str, ttl: int = OAUTH_STATE_TTL) -> None:
+        """Remember a newly issued state for ttl seconds."""
+        ...
+
+    async def pop(self, state: str) -> bool:
+        """Consume a state, returning True if it was issued and unexpired."""
+        ...
+
+
+class MemoryOAuthStateStore:
+    """
+    In-process store for local development.
+
+    Expired states are pruned whenever a new one is saved, so the dict stays
+    bounded by the number of sign-ins started within one TTL. Not shared
+    between workers - run a single worker or configure REDIS_URL.
+    """
+
+    def __init__(self):
+        self._expires_at: dict[str, float] = {}
+
+    async def save(self, state: str, ttl: int = OAUTH_STATE_TTL) -> None:
+        now = time.monotonic()
+        self._expires_at = {s: exp for s, exp in self._expires_at.items() if exp > now}
+        self._expires_at[state] = now + ttl
+
+    async def pop(self, state: str) -> bool:
+        expires_at = self._expires_at.pop(state, None)
+        return expires_at is not None and expires_at > time.monotonic()
+
+
+class RedisOAuthStateStore:
+    """Redis-backed store shared by every worker; Redis expires the keys."""
+
+    # Kept short: one key per pending sign-in
+    KEY_PREFIX = "tfo:"
+
+    def __init__(self, url: str):
+        # Imported here so redis is only required when REDIS_URL is set
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+
+    async def save(self, state: str, ttl: int = OAUTH_STATE_TTL) -> None:
+        await self._redis.set(f"{self.KEY_PREFIX}{state}", "1", ex=ttl, nx=True)
+
+    async def pop(self, state: str) -> bool:
+        # GETDEL checks and consumes atomically, so a state can't be replayed
+        # by two concurrent callbacks
+        return await self._redis.getdel(f"{self.KEY_PREFIX}{state}") is not None
+
+
+_store: Optional[OAuthStateStore] = None
+
+
+def get_oauth_state_store() -> OAuthStateStore:
+    """FastAPI dependency returning the process-wide state store."""
+    global _store
+    if _store is None:
+        if settings.REDIS_URL:
+            _store = RedisOAuthStateStore(settings.REDIS_URL)
+        else:
+            _store = MemoryOAuthStateStore()
+    return _store
@@ -1,37 +1,152 @@
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.date import DateTrigger
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, utcnow
+from app.models.ai_cache import REANALYSIS_CACHE_TTL, ReanalysisCache
 from app.models.reminder import Reminder, ReminderStatus
+from app.models.task import Task
+
+# Longest the scheduler sleeps with nothing due, so reminders written by
+# another process (which can't wake this one) are still picked up
+MAX_IDLE = timedelta(minutes=5)
+
+# Wait after a failed check before trying again; a due reminder is still
+# pending then, so rescheduling from the database would retry at once
+RETRY_DELAY = timedelta(seconds=30)
+
+JOB_ID = "check_reminders"
+PRUNE_JOB_ID = "prune_reanalysis_cache"
+
+# Held while choosing the next wakeup, so a reminder created concurrently
+# can't have its earlier wakeup overwritten by a stale one
+_schedule_lock = threading.Lock()
+
+# Due-ness is judged by the database clock, the same one /notifications uses.
+# Marking and returning the due reminders is a single statement.
+FIRE_DUE_REMINDERS = (
+    update(Reminder)
+    .where(
+        Reminder.status == ReminderStatus.PENDING.value,
+        Reminder.remind_at <= utcnow(),
+    )
+    .values(status=ReminderStatus.SENT.value)
+    .returning(Reminder.id, Reminder.task_id)
+    .execution_options(synchronize_session=False)
+)
+
+# Earliest pending reminder, served by the (status, remind_at) index as a
+# single seek, with the database's current time to measure the wait against
+SELECT_NEXT_REMIND_AT = (
+    select(func.min(Reminder.remind_at), utcnow())
+    .where(Reminder.status == ReminderStatus.PENDING.value)
+)
 
 
 def check_reminders():
     """Check for due reminders and mark them as sent."""
     db: Session = SessionLocal()
+    failed = False
     try:
-        now = datetime.utcnow()
-        due_reminders = (
-            db.query(Reminder)
-            .filter(
-                Reminder.status == ReminderStatus.PENDING,
-                Reminder.remind_at <= now,
-            )
-            .all()
-        )
+        fired = db.execute(FIRE_DUE_REMINDERS).all()
 
-        for reminder in due_reminders:
-            print(f"[REMINDER] Fired for task {reminder.task_id}: {reminder.task.clean_text}")
-            reminder.status = ReminderStatus.SENT
-            db.add(reminder)
+        if fired:
+            # Task text for the log lines, in one query for the whole batch
+            task_texts = dict(db.execute(
+                select(Task.id, Task.clean_text)
+                .where(Task.id.in_({reminder.task_id for reminder in fired}))
+            ).all())
+            for reminder in fired:
+                print(f"[REMINDER] Fired for task {reminder.task_id}: {task_texts.get(reminder.task_id)}")
 
-        if due_reminders:
             db.commit()
-            print(f"[OK] Processed {len(due_reminders)} reminder(s)")
+            print(f"[OK] Processed {len(fired)} reminder(s)")
 
     except Exception as e:
         print(f"[ERROR] Error checking reminders: {e}")
         db.rollback()
+        failed = True
+    finally:
+        # The tick's session also finds the next wakeup, rather than opening
+        # a second one
+        _schedule_next_check(db, failed)
+        db.close()
+
+
+def _schedule_next_check(db: Session, failed: bool = False):
+    """Sleep until the earliest pending reminder is due (at most MAX_IDLE).
+
+    After a failed check the next one waits RETRY_DELAY instead.
+    """
+    with _schedule_lock:
+        if not scheduler.running:
+            return
+        if failed:
+            _set_next_run(datetime.utcnow() + RETRY_DELAY)
+            return
+        run_at = datetime.utcnow() + MAX_IDLE
+        try:
+            next_remind_at, db_now = db.execute(SELECT_NEXT_REMIND_AT).one()
+        except Exception as e:
+            print(f"[ERROR] Error finding next reminder: {e}")
+            db.rollback()
+            next_remind_at = None
+
+        if next_remind_at is not None:
+            # Wait as long as the database clock says is left, so a skew
+            # between the two clocks can't wake the check early
+            run_at = min(run_at, datetime.utcnow() + (next_remind_at - db_now))
+        _set_next_run(run_at)
+
+
+def _set_next_run(run_at: datetime):
+    """(Re)schedule the check job for a naive UTC time, never in the past."""
+    run_at = max(run_at, datetime.utcnow())
+    scheduler.add_job(
+        check_reminders,
+        trigger=DateTrigger(run_date=run_at, timezone=timezone.utc),
+        id=JOB_ID,
+        name="Check for due reminders",
+        replace_existing=True,
+        misfire_grace_time=None,
+    )
+
+
+def wake_for_reminder(remind_at: datetime):
+    """Bring the next check forward for a newly created reminder.
+
+    Call after the reminder is committed. Only ever moves the wakeup
+    earlier; a later reminder is found by the check that runs first.
+    """
+    with _schedule_lock:
+        if not scheduler.running:
+            return
+        job = scheduler.get_job(JOB_ID)
+        next_run: Optional[datetime] = job.next_run_time if job else None
+        if next_run is not None:
+            next_run = next_run.astimezone(timezone.utc).replace(tzinfo=None)
+            if next_run <= remind_at:
+                return
+        _set_next_run(remind_at)
+
+
+def prune_reanalysis_cache():
+    """Delete re-analysis verdicts older than REANALYSIS_CACHE_TTL."""
+    db: Session = SessionLocal()
+    try:
+        result = db.execute(
+            delete(ReanalysisCache)
+            .where(ReanalysisCache.created_at < datetime.utcnow() - REANALYSIS_CACHE_TTL)
+        )
+        db.commit()
+        if result.rowcount:
+            print(f"[OK] Pruned {result.rowcount} expired re-analysis result(s)")
+    except Exception as e:
+        print(f"[ERROR] Error pruning re-analysis cache: {e}")
+        db.rollback()
     finally:
         db.close()
 
@@ -43,15 +158,19 @@ scheduler = BackgroundScheduler()
 def start_scheduler():
     """Start the background scheduler."""
     if not scheduler.running:
+        scheduler.start()
+        # First check runs immediately and schedules the following one
+        _set_next_run(datetime.utcnow())
         scheduler.add_job(
-            check_reminders,
-            trigger=IntervalTrigger(seconds=30),
-            id="check_reminders",
-            name="Check for due reminders",
+            prune_reanalysis_cache,
+            trigger="interval",
+            hours=24,
+            id=PRUNE_JOB_ID,
+            name="Prune expired re-analysis results",
             replace_existing=True,
+            next_run_time=datetime.now(timezone.utc),
         )
-        scheduler.start()
-        print("[SCHEDULER] Reminder scheduler started (checking every 30 seconds)")
+        print("[SCHEDULER] Reminder scheduler started (waking when the next reminder is due)")
 
 
 def stop_scheduler():
@@ -1,22 +1,29 @@
 from app.models.task import Task, TaskCategory
 
+# Words after which a message's recipient is looked for, in priority order
+RECIPIENT_CUES = ("to", "with", "ping", "message", "dm", "tell", "ask")
+
 
 class SuggestionService:
     @staticmethod
     def suggest_message(task: Task) -> str:
         """Generate a suggested short message/DM based on task text."""
-        clean = task.clean_text.lower()
+        clean = task.clean_text_lower
 
         # Extract potential recipient if mentioned
         recipient = "there"
-        for word in ["to", "with", "ping", "message", "dm", "tell", "ask"]:
-            if word in clean:
-                parts = clean.split(word)
-                if len(parts) > 1:
-                    potential = parts[1].strip().split()[0] if parts[1].strip() else ""
-                    if potential and len(potential) > 1:
-                        recipient = potential.title()
-                        break
+        for word in RECIPIENT_CUES:
+            start = clean.find(word)
+            if start < 0:
+                continue
+            # First word after the cue, looking no further than the cue's next
+            # occurrence (what split(word)[1] gave) without splitting it all
+            start += len(word)
+            end = clean.find(word, start)
+            potential = (clean[start:end] if end >= 0 else clean[start:]).split(maxsplit=1)
+            if potential and len(potential[0]) > 1:
+                recipient = potential[0].title()
+                break
 
         # Generate message based on content
         if "update" in clean or "status" in clean:
@@ -36,7 +43,7 @@ class SuggestionService:
     @staticmethod
     def suggest_email(task: Task) -> tuple[str, str]:
         """Generate suggested email subject and body."""
-        clean = task.clean_text.lower()
+        clean = task.clean_text_lower
         clean_text = task.clean_text
 
         # Determine email type and generate appropriate content
@@ -44,7 +51,7 @@ class SuggestionService:
             subject = f"Report: {clean_text[:40]}{'...' if len(clean_text) > 40 else ''}"
             body = f"""Hi,
 
-Please find below the report regarding {clean_text.lower()}.
+Please find below the report regarding {clean}.
 
 Summary:
 - [Key point 1]
@@ -116,7 +123,7 @@ Best regards"""
     @staticmethod
     def suggest_deploy_checklist(task: Task) -> list[str]:
         """Generate a deployment checklist based on task text."""
-        clean = task.clean_text.lower()
+        clean = task.clean_text_lower
 
         checklist = []
 
@@ -1,6 +1,30 @@
 import re
 from app.models.task import TaskCategory
 
+# Leading list markers like "- ", "* ", "• ", "1. "
+LIST_PREFIX_PATTERN = re.compile(r'^[\-\*\•\d\.]+\s*')
+
+# Time references that make an otherwise unclassified task a reminder
+# (e.g., "at 3pm", "by Friday"), unioned so one search covers them all
+REMINDER_TIME_PATTERN = re.compile(
+    r'\b(at|by|before|after)\s+\d{1,2}(:\d{2})?\s*(am|pm)?\b'
+    r'|\b(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b'
+    r'|\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\b'
+)
+
+# Common time patterns for extract_time(). Tried in order, and the first
+# pattern that matches anywhere wins (so "tomorrow at 3pm" yields "3pm");
+# a single alternation would return the leftmost match instead.
+TIME_PATTERNS = tuple(re.compile(p) for p in (
+    r'(\d{1,2}:\d{2}\s*(am|pm)?)',
+    r'(\d{1,2}\s*(am|pm))',
+    r'(tomorrow|today|tonight)',
+    r'(next\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday|week|month))',
+    r'(at\s+\d{1,2}(:\d{2})?\s*(am|pm)?)',
+    r'(by\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday))',
+    r'(in\s+\d+\s+(hours?|minutes?|days?))',
+))
+
 
 class TaskClassifier:
     DEPLOY_KEYWORDS = [
@@ -56,14 +80,8 @@ class TaskClassifier:
                 return TaskCategory.REMINDER
 
         # Check for time patterns (e.g., "at 3pm", "by Friday")
-        time_patterns = [
-            r'\b(at|by|before|after)\s+\d{1,2}(:\d{2})?\s*(am|pm)?\b',
-            r'\b(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b',
-            r'\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\b',
-        ]
-        for pattern in time_patterns:
-            if re.search(pattern, text_lower):
-                return TaskCategory.REMINDER
+        if REMINDER_TIME_PATTERN.search(text_lower):
+            return TaskCategory.REMINDER
 
         return TaskCategory.OTHER
 
@@ -72,7 +90,7 @@ class TaskClassifier:
         """Clean and normalize task text."""
         text = raw_text.strip()
         # Remove common prefixes like "- ", "* ", "• ", numbers
-        text = re.sub(r'^[\-\*\•\d\.]+\s*', '', text)
+        text = LIST_PREFIX_PATTERN.sub('', text, count=1)
         return text.strip()
 
     @classmethod
@@ -80,19 +98,8 @@ class TaskClassifier:
         """Extract time reference from task text."""
         text_lower = text.lower()
 
-        # Common time patterns
-        patterns = [
-            r'(\d{1,2}:\d{2}\s*(am|pm)?)',
-            r'(\d{1,2}\s*(am|pm))',
-            r'(tomorrow|today|tonight)',
-            r'(next\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday|week|month))',
-            r'(at\s+\d{1,2}(:\d{2})?\s*(am|pm)?)',
-            r'(by\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday))',
-            r'(in\s+\d+\s+(hours?|minutes?|days?))',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in TIME_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 return match.group(0)
 
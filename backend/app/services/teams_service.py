@@ -4,15 +4,33 @@ Microsoft Teams Integration Service
 This service handles fetching messages where the user is @mentioned
 using Microsoft Graph API.
 """
+import asyncio
+import hashlib
+import re
+import secrets
+import time
 import httpx
-from typing import List, Optional
-from datetime import datetime
-from pydantic import BaseModel
+import orjson
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Iterator, List, Optional
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote, urlencode
+from cachetools import TTLCache
 from app.core.config import settings
+from app.core.log import get_logger
 
+logger = get_logger("teams")
 
-class TeamsMention(BaseModel):
-    """Represents a Teams message where user was mentioned."""
+
+@dataclass(slots=True, kw_only=True)
+class TeamsMention:
+    """
+    Represents a Teams message where user was mentioned.
+
+    A plain data carrier built from Graph responses inside this service;
+    validation happens once, when routes convert it to MentionResponse.
+    """
     id: str
     message_text: str
     sender_name: str
@@ -30,7 +48,7 @@ class TeamsMention(BaseModel):
     requested_at: Optional[datetime] = None
     graph_metadata: Optional[dict] = None
     # Status field
-    status: Optional[str] = "Open"  # 'Open', 'In Progress', 'Done'
+    status: str = "Open"  # 'Open', 'In Progress', 'Done'
 
 
 class TeamsServiceError(Exception):
@@ -38,6 +56,96 @@ class TeamsServiceError(Exception):
     pass
 
 
+# Splits on commas and strips the whitespace around each one in a single pass
+_CSV_SPLIT = re.compile(r"\s*,\s*").split
+
+# Markup in Graph message bodies, removed to get the plain text
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+# Bodies longer than this are stripped without being cached, bounding the
+# memory held by _strip_html_cached
+STRIP_HTML_CACHE_MAX_LEN = 8192
+
+
+@lru_cache(maxsize=256)
+def _parse_filter(value: Optional[str]) -> FrozenSet[str]:
+    """Parse a comma-separated filter query param (saved UI filters repeat)."""
+    return frozenset(_CSV_SPLIT(value.strip())) if value else frozenset()
+
+
+def _strip_html(content: str) -> str:
+    """Plain text of an HTML message body."""
+    return _HTML_TAG.sub('', content).strip()
+
+
+# System messages and repeated replies recur across chats and polls
+_strip_html_cached = lru_cache(maxsize=2048)(_strip_html)
+
+
+def iter_filtered_mentions(
+    mentions: Iterable[TeamsMention],
+    users: Optional[str] = None,
+    group_chats: Optional[str] = None,
+    meeting_chats: Optional[str] = None,
+    individual_chats: Optional[str] = None,
+) -> Iterator[TeamsMention]:
+    """
+    Lazily filter mentions by sender and chat name, as sent by the mentions endpoints.
+
+    Each argument is a comma-separated list of names. A chat-type filter only
+    applies to mentions of that type: a group, meeting or individual chat is
+    kept if its type has no filter or its chat name is in it, and mentions of
+    other types pass through. Channel messages (no chat_type) are named as
+    "Team/Channel" in the group filter; they are filtered only once it names
+    a channel. Mentions without a chat type, such as email, are never
+    dropped by chat filters. Unknown chat types are dropped once any chat
+    filter is active.
+    """
+    if not (users or group_chats or meeting_chats or individual_chats):
+        yield from mentions
+        return
+
+    user_set = _parse_filter(users)
+    chat_sets = {
+        "group": _parse_filter(group_chats),
+        "meeting": _parse_filter(meeting_chats),
+        "individual": _parse_filter(individual_chats),
+    }
+    has_chat_filter = any(chat_sets.values())
+    channel_set = frozenset(name for name in chat_sets["group"] if "/" in name)
+
+    for m in mentions:
+        # Filter by user
+        if user_set and m.sender_name not in user_set:
+            continue
+
+        # Filter by chat type and name
+        if m.is_from_channel:
+            if channel_set and f"{m.team_name}/{m.channel_name}" not in channel_set:
+                continue
+        elif m.chat_type in chat_sets:
+            chat_set = chat_sets[m.chat_type]
+            if chat_set and m.chat_name not in chat_set:
+                continue
+        elif m.chat_type is not None and has_chat_filter:
+            continue
+
+        yield m
+
+
+def apply_mention_filters(
+    mentions: List[TeamsMention],
+    users: Optional[str] = None,
+    group_chats: Optional[str] = None,
+    meeting_chats: Optional[str] = None,
+    individual_chats: Optional[str] = None,
+) -> List[TeamsMention]:
+    """Filter mentions into a list; see iter_filtered_mentions."""
+    if not (users or group_chats or meeting_chats or individual_chats):
+        return mentions
+    return list(iter_filtered_mentions(mentions, users, group_chats, meeting_chats, individual_chats))
+
+
 class TeamsService:
     """
     Service for interacting with Microsoft Graph API to fetch Teams mentions.
@@ -49,18 +157,174 @@ class TeamsService:
     GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
     TOKEN_URL = "https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
 
+    # Graph accepts at most 20 sub-requests per $batch call
+    BATCH_SIZE = 20
+    # Throttled (429) sub-requests are retried this many times, waiting for
+    # their Retry-After but never longer than BATCH_MAX_RETRY_AFTER seconds
+    BATCH_MAX_RETRIES = 3
+    BATCH_MAX_RETRY_AFTER = 30.0
+
+    # The app token is treated as expired (and refreshed in the background)
+    # this many seconds before Graph expires it; background refreshes are at
+    # least TOKEN_MIN_REFRESH_INTERVAL seconds apart, and a failed one is
+    # retried after TOKEN_RETRY_DELAY seconds
+    TOKEN_REFRESH_AHEAD = 5 * 60
+    TOKEN_MIN_REFRESH_INTERVAL = 30
+    TOKEN_RETRY_DELAY = 60
+
+    # Per-user mentions are cached briefly so UI polling doesn't re-hit Graph
+    MENTIONS_CACHE_TTL = 60
+    MENTIONS_CACHE_SIZE = 2048
+    # Chat member names change rarely, so they outlive the mentions cache
+    CHAT_MEMBERS_CACHE_TTL = 15 * 60
+    CHAT_MEMBERS_CACHE_SIZE = 4096
+
     def __init__(self):
         self.client_id = settings.MS_GRAPH_CLIENT_ID
         self.client_secret = settings.MS_GRAPH_CLIENT_SECRET
         self.tenant_id = settings.MS_GRAPH_TENANT_ID
         self._access_token: Optional[str] = None
-        self._token_expires: Optional[datetime] = None
+        # time.monotonic() deadline, so checking it (on every Graph call)
+        # needs no datetime and can't be moved by wall-clock changes
+        self._token_expires_at: Optional[float] = None
+        # Serializes token fetches, so concurrent requests after expiry share
+        # one /token call instead of each making their own
+        self._token_lock = asyncio.Lock()
+        # The credentials are fixed for the process, so the /token form body
+        # is encoded once
+        self._token_body = urlencode({
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "scope": "https://graph.microsoft.com/.default",
+            "grant_type": "client_credentials",
+        }).encode()
+        # $batch headers for the current app token, rebuilt when it rotates
+        self._app_token_headers: Optional[dict] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._mentions_cache = TTLCache(maxsize=self.MENTIONS_CACHE_SIZE, ttl=self.MENTIONS_CACHE_TTL)
+        # Cache keys are keyed hashes of the access token, never the token itself
+        self._mentions_cache_salt = secrets.token_bytes(16)
+        # chat_id -> member display names, shared by every user in the chat
+        self._chat_members_cache = TTLCache(maxsize=self.CHAT_MEMBERS_CACHE_SIZE, ttl=self.CHAT_MEMBERS_CACHE_TTL)
 
     @property
     def is_configured(self) -> bool:
         """Check if the service is properly configured."""
         return bool(self.client_id and self.client_secret and self.tenant_id)
 
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Process-wide client, so Graph and login calls reuse pooled connections."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                # Concurrent Graph calls share multiplexed connections
+                http2=True,
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+            )
+        return self._http_client
+
+    async def aclose(self):
+        """Close the shared HTTP client and drop cached message text (called on application shutdown)."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        _strip_html_cached.cache_clear()
+
+    @staticmethod
+    def _graph_url(path: str, params: Optional[dict] = None) -> str:
+        """Build a relative Graph URL for use inside a $batch request."""
+        if not params:
+            return path
+        return f"{path}?{urlencode(params, safe='$', quote_via=quote)}"
+
+    @staticmethod
+    def _graph_headers(token: str) -> dict:
+        """Headers for a Graph $batch request made with the given token."""
+        return {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+
+    @staticmethod
+    def _batch_values(response: dict) -> list:
+        """Return the "value" collection from a $batch sub-response body."""
+        return (response.get("body") or {}).get("value", [])
+
+    async def _graph_batch(self, requests: List[dict], token: str) -> List[dict]:
+        """
+        Send Graph requests through the JSON $batch endpoint.
+
+        Each request is a dict with a relative "url" (and optional "method",
+        default GET). Requests are sent BATCH_SIZE per round trip, with all
+        round trips in flight concurrently, and sub-requests throttled with
+        429 are retried after their Retry-After.
+
+        Returns one sub-response dict ({"status", "headers", "body"}) per
+        request, in request order.
+        """
+        results: List[Optional[dict]] = [None] * len(requests)
+        pending = list(range(len(requests)))
+        if token == self._access_token and self._app_token_headers is not None:
+            headers = self._app_token_headers
+        else:
+            # Delegated user tokens are not kept, so their headers are per call
+            headers = self._graph_headers(token)
+
+        async def post_batch(chunk: List[int]) -> List[dict]:
+            response = await self.http_client.post(
+                f"{self.GRAPH_BASE_URL}/$batch",
+                headers=headers,
+                json={
+                    "requests": [
+                        {
+                            "id": str(i),
+                            "method": requests[i].get("method", "GET"),
+                            "url": requests[i]["url"],
+                        }
+                        for i in chunk
+                    ]
+                },
+            )
+
+            if response.status_code == 401:
+                raise TeamsServiceError("Invalid access token")
+            if response.status_code != 200:
+                raise TeamsServiceError(f"Graph batch request failed: {response.status_code}")
+
+            return orjson.loads(response.content).get("responses", [])
+
+        for attempt in range(self.BATCH_MAX_RETRIES + 1):
+            throttled = []
+            retry_after = 1.0
+
+            # Batches are independent, so they are all in flight at once
+            batch_responses = await asyncio.gather(*(
+                post_batch(pending[start:start + self.BATCH_SIZE])
+                for start in range(0, len(pending), self.BATCH_SIZE)
+            ))
+
+            for sub_responses in batch_responses:
+                for sub_response in sub_responses:
+                    index = int(sub_response["id"])
+                    results[index] = sub_response
+                    if sub_response.get("status") == 429:
+                        throttled.append(index)
+                        try:
+                            wait = float((sub_response.get("headers") or {}).get("Retry-After", 1))
+                        except (TypeError, ValueError):
+                            wait = 1.0
+                        retry_after = max(retry_after, wait)
+
+            if not throttled or attempt == self.BATCH_MAX_RETRIES:
+                break
+
+            logger.info("%d batched requests throttled, retrying in %ss", len(throttled), retry_after)
+            await asyncio.sleep(min(retry_after, self.BATCH_MAX_RETRY_AFTER))
+            pending = throttled
+
+        return [r if r is not None else {"status": 0, "headers": {}, "body": {}} for r in results]
+
     async def _get_access_token(self) -> str:
         """
         Get an access token using client credentials flow.
@@ -68,10 +332,45 @@ class TeamsService:
         Returns cached token if still valid, otherwise fetches a new one.
         """
         # Check if we have a valid cached token
-        if self._access_token and self._token_expires:
-            if datetime.now() < self._token_expires:
+        if self._has_valid_token():
+            return self._access_token
+
+        async with self._token_lock:
+            # Another request may have refreshed it while this one waited
+            if self._has_valid_token():
                 return self._access_token
+            return await self._fetch_access_token()
+
+    async def refresh_token_loop(self):
+        """
+        Keep the app token fresh so requests never wait on /token.
 
+        Run as a background task for the application's lifetime;
+        _get_access_token still fetches inline if this falls behind.
+        """
+        while self.is_configured:
+            if self._token_expires_at is not None:
+                # The deadline already has TOKEN_REFRESH_AHEAD taken off; the
+                # floor keeps short-lived tokens from being refetched back to back
+                wait = self._token_expires_at - time.monotonic()
+                await asyncio.sleep(max(wait, self.TOKEN_MIN_REFRESH_INTERVAL))
+            try:
+                async with self._token_lock:
+                    await self._fetch_access_token()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Background token refresh failed: %s", e)
+                await asyncio.sleep(self.TOKEN_RETRY_DELAY)
+
+    def _has_valid_token(self) -> bool:
+        return bool(
+            self._access_token and self._token_expires_at
+            and time.monotonic() < self._token_expires_at
+        )
+
+    async def _fetch_access_token(self) -> str:
+        """Fetch and cache a new client credentials token."""
         if not self.is_configured:
             raise TeamsServiceError(
                 "Microsoft Graph API is not configured. "
@@ -80,32 +379,26 @@ class TeamsService:
 
         token_url = self.TOKEN_URL.format(tenant_id=self.tenant_id)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                token_url,
-                data={
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                    "scope": "https://graph.microsoft.com/.default",
-                    "grant_type": "client_credentials",
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-            )
+        response = await self.http_client.post(
+            token_url,
+            content=self._token_body,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
 
-            if response.status_code != 200:
-                error_data = response.json()
-                raise TeamsServiceError(
-                    f"Failed to get access token: {error_data.get('error_description', 'Unknown error')}"
-                )
+        if response.status_code != 200:
+            error_data = orjson.loads(response.content)
+            raise TeamsServiceError(
+                f"Failed to get access token: {error_data.get('error_description', 'Unknown error')}"
+            )
 
-            token_data = response.json()
-            self._access_token = token_data["access_token"]
-            # Token expires in 'expires_in' seconds, cache with 5 min buffer
-            expires_in = token_data.get("expires_in", 3600) - 300
-            from datetime import timedelta
-            self._token_expires = datetime.now() + timedelta(seconds=expires_in)
+        token_data = orjson.loads(response.content)
+        self._access_token = token_data["access_token"]
+        self._app_token_headers = self._graph_headers(self._access_token)
+        # Token expires in 'expires_in' seconds, cache with a TOKEN_REFRESH_AHEAD buffer
+        expires_in = token_data.get("expires_in", 3600) - self.TOKEN_REFRESH_AHEAD
+        self._token_expires_at = time.monotonic() + expires_in
 
-            return self._access_token
+        return self._access_token
 
     async def get_my_mentions(self, limit: int = 5) -> List[TeamsMention]:
         """
@@ -126,154 +419,139 @@ class TeamsService:
 
         try:
             token = await self._get_access_token()
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-            }
 
             mentions = []
 
-            async with httpx.AsyncClient() as client:
-                # First, get the user's chats
-                chats_response = await client.get(
-                    f"{self.GRAPH_BASE_URL}/me/chats",
-                    headers=headers,
-                    params={"$top": 50},
-                )
-
-                if chats_response.status_code != 200:
-                    print(f"[TEAMS] Error fetching chats: {chats_response.text}")
-                    return self._get_mock_mentions(limit)
+            # First, get the user's chats and joined teams in one round trip
+            chats_response, teams_response = await self._graph_batch([
+                {"url": self._graph_url("/me/chats", {"$top": 50})},
+                {"url": "/me/joinedTeams"},
+            ], token)
 
-                chats = chats_response.json().get("value", [])
-
-                # For each chat, get recent messages and filter for mentions
-                for chat in chats[:10]:  # Limit to first 10 chats for performance
-                    chat_id = chat.get("id")
-                    if not chat_id:
-                        continue
-
-                    messages_response = await client.get(
-                        f"{self.GRAPH_BASE_URL}/me/chats/{chat_id}/messages",
-                        headers=headers,
-                        params={"$top": 20, "$orderby": "createdDateTime desc"},
-                    )
-
-                    if messages_response.status_code != 200:
-                        continue
-
-                    messages = messages_response.json().get("value", [])
-
-                    for msg in messages:
-                        # Check if the message contains mentions
-                        msg_mentions = msg.get("mentions", [])
-                        if msg_mentions:
-                            # Parse the message
-                            body = msg.get("body", {})
-                            content = body.get("content", "")
-
-                            # Strip HTML tags for clean text
-                            import re
-                            clean_text = re.sub(r'<[^>]+>', '', content).strip()
-
-                            sender = msg.get("from", {})
-                            user_info = sender.get("user", {}) or sender.get("application", {})
-
-                            mention = TeamsMention(
-                                id=msg.get("id", ""),
-                                message_text=clean_text,
-                                sender_name=user_info.get("displayName", "Unknown"),
-                                sender_email=user_info.get("email"),
-                                chat_name=chat.get("topic"),
-                                timestamp=datetime.fromisoformat(
-                                    msg.get("createdDateTime", "").replace("Z", "+00:00")
-                                ),
-                                web_url=msg.get("webUrl"),
-                                is_from_channel=False,
-                            )
-                            mentions.append(mention)
-
-                            if len(mentions) >= limit:
-                                return mentions
-
-                # Also check team channels for mentions
-                teams_response = await client.get(
-                    f"{self.GRAPH_BASE_URL}/me/joinedTeams",
-                    headers=headers,
-                )
-
-                if teams_response.status_code == 200:
-                    teams = teams_response.json().get("value", [])
-
-                    for team in teams[:5]:  # Limit teams checked
-                        team_id = team.get("id")
-                        team_name = team.get("displayName", "Unknown Team")
+            if chats_response["status"] != 200:
+                logger.error("Error fetching chats: %s", chats_response.get("body"))
+                return self._get_mock_mentions(limit)
 
-                        channels_response = await client.get(
-                            f"{self.GRAPH_BASE_URL}/teams/{team_id}/channels",
-                            headers=headers,
+            # Limit to first 10 chats and 5 teams for performance
+            chats = [chat for chat in self._batch_values(chats_response)[:10] if chat.get("id")]
+            teams = self._batch_values(teams_response)[:5] if teams_response["status"] == 200 else []
+
+            # Recent messages of every chat and the channels of every team, batched together
+            responses = await self._graph_batch(
+                [
+                    {"url": self._graph_url(
+                        f"/me/chats/{chat['id']}/messages",
+                        {"$top": 20, "$orderby": "createdDateTime desc"},
+                    )}
+                    for chat in chats
+                ]
+                + [
+                    # Only the channel fields read below
+                    {"url": self._graph_url(f"/teams/{team.get('id')}/channels", {"$select": "id,displayName"})}
+                    for team in teams
+                ],
+                token,
+            )
+            messages_responses, channels_responses = responses[:len(chats)], responses[len(chats):]
+
+            # Filter chat messages for mentions
+            for chat, messages_response in zip(chats, messages_responses):
+                if messages_response["status"] != 200:
+                    continue
+
+                for msg in self._batch_values(messages_response):
+                    # Check if the message contains mentions
+                    if msg.get("mentions", []):
+                        sender = msg.get("from", {})
+                        mention = self._parse_message(
+                            msg,
+                            self._message_text(msg),
+                            sender.get("user", {}) or sender.get("application", {}),
+                            chat_name=chat.get("topic"),
+                            is_from_channel=False,
                         )
+                        mentions.append(mention)
 
-                        if channels_response.status_code != 200:
-                            continue
+                        if len(mentions) >= limit:
+                            return mentions
+
+            # Also check team channels for mentions
+            channels = []  # (team_name, channel_name, messages_url)
+            for team, channels_response in zip(teams, channels_responses):
+                if channels_response["status"] != 200:
+                    continue
+
+                team_name = team.get("displayName", "Unknown Team")
+                for channel in self._batch_values(channels_response)[:3]:  # Limit channels per team
+                    channels.append((
+                        team_name,
+                        channel.get("displayName", "Unknown Channel"),
+                        self._graph_url(
+                            f"/teams/{team.get('id')}/channels/{channel.get('id')}/messages",
+                            {"$top": 10, "$orderby": "createdDateTime desc"},
+                        ),
+                    ))
+
+            msgs_responses = await self._graph_batch([{"url": url} for _, _, url in channels], token)
+
+            for (team_name, channel_name, _), msgs_response in zip(channels, msgs_responses):
+                if msgs_response["status"] != 200:
+                    continue
+
+                for msg in self._batch_values(msgs_response):
+                    if msg.get("mentions"):
+                        mention = self._parse_message(
+                            msg,
+                            self._message_text(msg),
+                            msg.get("from", {}).get("user", {}) or {},
+                            channel_name=channel_name,
+                            team_name=team_name,
+                            is_from_channel=True,
+                        )
+                        mentions.append(mention)
 
-                        channels = channels_response.json().get("value", [])
-
-                        for channel in channels[:3]:  # Limit channels per team
-                            channel_id = channel.get("id")
-                            channel_name = channel.get("displayName", "Unknown Channel")
-
-                            msgs_response = await client.get(
-                                f"{self.GRAPH_BASE_URL}/teams/{team_id}/channels/{channel_id}/messages",
-                                headers=headers,
-                                params={"$top": 10, "$orderby": "createdDateTime desc"},
-                            )
-
-                            if msgs_response.status_code != 200:
-                                continue
-
-                            for msg in msgs_response.json().get("value", []):
-                                if msg.get("mentions"):
-                                    body = msg.get("body", {})
-                                    content = body.get("content", "")
-                                    import re
-                                    clean_text = re.sub(r'<[^>]+>', '', content).strip()
-
-                                    sender = msg.get("from", {})
-                                    user_info = sender.get("user", {}) or {}
-
-                                    mention = TeamsMention(
-                                        id=msg.get("id", ""),
-                                        message_text=clean_text,
-                                        sender_name=user_info.get("displayName", "Unknown"),
-                                        sender_email=user_info.get("email"),
-                                        channel_name=channel_name,
-                                        team_name=team_name,
-                                        timestamp=datetime.fromisoformat(
-                                            msg.get("createdDateTime", "").replace("Z", "+00:00")
-                                        ),
-                                        web_url=msg.get("webUrl"),
-                                        is_from_channel=True,
-                                    )
-                                    mentions.append(mention)
-
-                                    if len(mentions) >= limit:
-                                        return mentions
+                        if len(mentions) >= limit:
+                            return mentions
 
             return mentions[:limit]
 
         except Exception as e:
-            print(f"[TEAMS] Error fetching mentions: {e}")
+            logger.error("Error fetching mentions: %s", e)
             # Return mock data as fallback
             return self._get_mock_mentions(limit)
 
+    @staticmethod
+    def _message_text(msg: dict) -> str:
+        """Plain text of a Graph chat/channel message, with its HTML tags stripped."""
+        content = msg.get("body", {}).get("content", "")
+        if len(content) > STRIP_HTML_CACHE_MAX_LEN:
+            return _strip_html(content)
+        return _strip_html_cached(content)
+
+    @staticmethod
+    def _parse_message(msg: dict, clean_text: str, user_info: dict, **fields) -> TeamsMention:
+        """
+        Build a mention from a Graph chat/channel message.
+
+        fields describe where the message came from (chat, channel, team...)
+        and are passed straight to TeamsMention.
+        """
+        return TeamsMention(
+            id=msg.get("id", ""),
+            message_text=clean_text,
+            # Graph sends a null displayName for some senders (e.g. deleted users)
+            sender_name=user_info.get("displayName") or "Unknown",
+            sender_email=user_info.get("email"),
+            timestamp=datetime.fromisoformat(msg.get("createdDateTime", "")),
+            web_url=msg.get("webUrl"),
+            **fields,
+        )
+
     def _get_mock_mentions(self, limit: int = 5) -> List[TeamsMention]:
         """
         Return mock mentions for development/demo purposes.
         """
-        from datetime import timedelta
-
-        now = datetime.now()
+        now = datetime.now(timezone.utc)
 
         mock_mentions = [
             TeamsMention(
@@ -377,6 +655,7 @@ class TeamsService:
         Fetch recent messages from Teams chats using a user access token.
 
         This uses ChatMessage.Read permission to get 1:1 and group chat messages.
+        Results are cached per token and limit for MENTIONS_CACHE_TTL seconds.
 
         Args:
             access_token: OAuth access token for the authenticated user
@@ -385,183 +664,182 @@ class TeamsService:
         Returns:
             List of TeamsMention objects containing message details
         """
-        import re
-
+        cache_key = hashlib.blake2b(
+            f"{access_token}|{limit}".encode(),
+            key=self._mentions_cache_salt,
+            digest_size=16,
+        ).hexdigest()
+
+        mentions = self._mentions_cache.get(cache_key)
+        if mentions is None:
+            # Errors (including an invalid token) propagate and are never cached
+            mentions = await self._fetch_mentions_with_token(access_token, limit)
+            self._mentions_cache[cache_key] = mentions
+
+        return list(mentions)
+
+    async def _fetch_mentions_with_token(self, access_token: str, limit: int) -> List[TeamsMention]:
+        """Fetch mentions from Graph for get_my_mentions_with_token (uncached)."""
         try:
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json",
-            }
-
             mentions = []
 
-            async with httpx.AsyncClient() as client:
-                # First, verify the token works by getting user profile
-                print("[TEAMS] Verifying token with /me endpoint...")
-                me_response = await client.get(
-                    f"{self.GRAPH_BASE_URL}/me",
-                    headers=headers,
-                )
-
-                if me_response.status_code != 200:
-                    print(f"[TEAMS] Token invalid: {me_response.status_code}")
-                    raise TeamsServiceError("Invalid access token")
-
-                user_data = me_response.json()
-                user_id = user_data.get("id")
-                print(f"[TEAMS] Authenticated as: {user_data.get('displayName', 'Unknown')} (id: {user_id})")
-
-                # Get user's recent Teams activity - try multiple approaches
-                print("[TEAMS] Fetching recent Teams activity...")
-
-                # Approach 1: Try to get user's mailbox messages (uses Mail.Read)
-                print("[TEAMS] Trying /me/messages endpoint...")
-                messages_response = await client.get(
-                    f"{self.GRAPH_BASE_URL}/me/messages",
-                    headers=headers,
-                    params={
-                        "$top": 20,
-                        "$filter": "from/emailAddress/address ne '{user_data.get('mail', '')}'",
-                        "$select": "id,subject,bodyPreview,from,receivedDateTime,webLink",
-                        "$orderby": "receivedDateTime DESC"
-                    },
+            # Verify the token with the user profile while fetching both message
+            # sources (mailbox needs Mail.Read, chats need Chat.Read) in one round trip
+            logger.debug("Verifying token and fetching recent Teams activity...")
+            me_response, messages_response, chats_response = await self._graph_batch([
+                {"url": "/me"},
+                {"url": self._graph_url("/me/messages", {
+                    "$top": 20,
+                    "$filter": "from/emailAddress/address ne '{user_data.get('mail', '')}'",
+                    "$select": "id,subject,bodyPreview,from,receivedDateTime,webLink",
+                    "$orderby": "receivedDateTime DESC"
+                })},
+                # Members come from the chat members cache rather than $expand,
+                # which inlines every participant of every chat
+                {"url": self._graph_url("/me/chats", {"$top": 20})},
+            ], access_token)
+
+            if me_response["status"] != 200:
+                logger.warning("Token invalid: %s", me_response["status"])
+                raise TeamsServiceError("Invalid access token")
+
+            user_data = me_response["body"]
+            user_id = user_data.get("id")
+            logger.debug("Authenticated as: %s (id: %s)", user_data.get("displayName", "Unknown"), user_id)
+
+            # Approach 1: user's mailbox messages
+            if messages_response["status"] == 200:
+                messages = self._batch_values(messages_response)
+                logger.debug("Found %d email messages", len(messages))
+
+                for msg in messages[:limit]:
+                    sender = msg.get("from", {}).get("emailAddress", {})
+
+                    mention = TeamsMention(
+                        id=msg.get("id", ""),
+                        message_text=msg.get("subject", "") + " - " + msg.get("bodyPreview", ""),
+                        sender_name=sender.get("name", "Unknown"),
+                        sender_email=sender.get("address"),
+                        channel_name="Email",
+                        team_name="Outlook",
+                        timestamp=datetime.fromisoformat(msg.get("receivedDateTime", "")),
+                        web_url=msg.get("webLink"),
+                        is_from_channel=False,
+                    )
+                    mentions.append(mention)
+
+                if mentions:
+                    logger.debug("Returning %d email messages", len(mentions))
+                    return mentions
+
+            # Approach 2: chats
+            if chats_response["status"] == 200:
+                chats = self._batch_values(chats_response)[:10]  # Check up to 10 chats
+                logger.debug("Found %d chats", len(chats))
+
+                request_time = datetime.now(timezone.utc)
+
+                # Get messages from every chat, and members of chats not in the
+                # members cache, in one batch
+                uncached_chat_ids = [
+                    chat.get("id") for chat in chats
+                    if chat.get("id") and chat.get("id") not in self._chat_members_cache
+                ]
+                responses = await self._graph_batch(
+                    [
+                        {"url": self._graph_url(f"/me/chats/{chat.get('id')}/messages", {"$top": 10})}
+                        for chat in chats
+                    ]
+                    + [{"url": f"/chats/{chat_id}/members"} for chat_id in uncached_chat_ids],
+                    access_token,
                 )
+                msgs_responses, members_responses = responses[:len(chats)], responses[len(chats):]
 
-                if messages_response.status_code == 200:
-                    messages = messages_response.json().get("value", [])
-                    print(f"[TEAMS] Found {len(messages)} email messages")
-
-                    for msg in messages[:limit]:
-                        sender = msg.get("from", {}).get("emailAddress", {})
-
-                        mention = TeamsMention(
-                            id=msg.get("id", ""),
-                            message_text=msg.get("subject", "") + " - " + msg.get("bodyPreview", ""),
-                            sender_name=sender.get("name", "Unknown"),
-                            sender_email=sender.get("address"),
-                            channel_name="Email",
-                            team_name="Outlook",
-                            timestamp=datetime.fromisoformat(
-                                msg.get("receivedDateTime", "").replace("Z", "+00:00")
-                            ),
-                            web_url=msg.get("webLink"),
-                            is_from_channel=False,
+                for chat_id, members_response in zip(uncached_chat_ids, members_responses):
+                    if members_response["status"] == 200:
+                        self._chat_members_cache[chat_id] = tuple(
+                            m.get("displayName") for m in self._batch_values(members_response)
                         )
-                        mentions.append(mention)
+                # Read once up front, so an entry expiring mid-loop can't drop names
+                chat_members = {chat.get("id"): self._chat_members_cache.get(chat.get("id"), ()) for chat in chats}
 
-                    if mentions:
-                        print(f"[TEAMS] Returning {len(mentions)} email messages")
-                        return mentions
+                for chat, msgs_response in zip(chats, msgs_responses):
+                    chat_id = chat.get("id")
+                    chat_topic = chat.get("topic") or "Direct Chat"
+                    graph_chat_type = chat.get("chatType", "unknown")  # 'oneOnOne', 'group', 'meeting'
+
+                    # Determine our chat_type category
+                    if graph_chat_type == "oneOnOne":
+                        our_chat_type = "individual"
+                    elif graph_chat_type == "meeting":
+                        our_chat_type = "meeting"
+                    else:  # 'group' or unknown
+                        our_chat_type = "group"
+
+                    # Get chat members for display
+                    members = chat_members[chat_id]
+                    member_names = [name for name in members if name]
+                    chat_name = chat_topic if chat_topic != "Direct Chat" else ", ".join(member_names[:3])
+
+                    logger.debug("Checking chat: %s (type: %s, graph_type: %s)", chat_name, our_chat_type, graph_chat_type)
+
+                    if msgs_response["status"] == 403:
+                        logger.debug("Permission denied for messages in chat %s", chat_name)
+                        continue
 
-                # Approach 2: Try /me/chats (requires Chat.Read)
-                print("[TEAMS] Trying /me/chats endpoint...")
-                chats_response = await client.get(
-                    f"{self.GRAPH_BASE_URL}/me/chats",
-                    headers=headers,
-                    params={"$top": 20, "$expand": "members"},
-                )
+                    if msgs_response["status"] != 200:
+                        logger.warning("Error fetching messages: %s - %s", msgs_response["status"], msgs_response.get("body"))
+                        continue
 
-                if chats_response.status_code == 200:
-                    chats = chats_response.json().get("value", [])
-                    print(f"[TEAMS] Found {len(chats)} chats")
-
-                    request_time = datetime.now()
-
-                    for chat in chats[:10]:  # Check up to 10 chats
-                        chat_id = chat.get("id")
-                        chat_topic = chat.get("topic") or "Direct Chat"
-                        graph_chat_type = chat.get("chatType", "unknown")  # 'oneOnOne', 'group', 'meeting'
-
-                        # Determine our chat_type category
-                        if graph_chat_type == "oneOnOne":
-                            our_chat_type = "individual"
-                        elif graph_chat_type == "meeting":
-                            our_chat_type = "meeting"
-                        else:  # 'group' or unknown
-                            our_chat_type = "group"
-
-                        # Get chat members for display
-                        members = chat.get("members", [])
-                        member_names = [m.get("displayName", "Unknown") for m in members if m.get("displayName")]
-                        chat_name = chat_topic if chat_topic != "Direct Chat" else ", ".join(member_names[:3])
-
-                        print(f"[TEAMS] Checking chat: {chat_name} (type: {our_chat_type}, graph_type: {graph_chat_type})")
-
-                        # Get messages from this chat
-                        msgs_response = await client.get(
-                            f"{self.GRAPH_BASE_URL}/me/chats/{chat_id}/messages",
-                            headers=headers,
-                            params={"$top": 10},
-                        )
+                    messages = self._batch_values(msgs_response)
+                    logger.debug("Found %d messages in %s", len(messages), chat_name)
 
-                        if msgs_response.status_code == 403:
-                            print(f"[TEAMS] Permission denied for messages in chat {chat_name}")
+                    for msg in messages:
+                        msg_type = msg.get("messageType", "")
+                        if msg_type != "message":
                             continue
 
-                        if msgs_response.status_code != 200:
-                            print(f"[TEAMS] Error fetching messages: {msgs_response.status_code} - {msgs_response.text}")
+                        clean_text = self._message_text(msg)
+                        if not clean_text:
                             continue
 
-                        messages = msgs_response.json().get("value", [])
-                        print(f"[TEAMS] Found {len(messages)} messages in {chat_name}")
-
-                        for msg in messages:
-                            msg_type = msg.get("messageType", "")
-                            if msg_type != "message":
-                                continue
-
-                            body = msg.get("body", {})
-                            content = body.get("content", "")
-                            clean_text = re.sub(r'<[^>]+>', '', content).strip()
-
-                            if not clean_text:
-                                continue
-
-                            sender = msg.get("from", {})
-                            user_info = sender.get("user", {}) or {}
-
-                            mention = TeamsMention(
-                                id=msg.get("id", ""),
-                                message_text=clean_text,
-                                sender_name=user_info.get("displayName", "Unknown"),
-                                sender_email=user_info.get("email"),
-                                chat_name=chat_name,
-                                team_name="Chat",
-                                timestamp=datetime.fromisoformat(
-                                    msg.get("createdDateTime", "").replace("Z", "+00:00")
-                                ),
-                                web_url=msg.get("webUrl"),
-                                is_from_channel=False,
-                                chat_type=our_chat_type,
-                                chat_id=chat_id,
-                                requested_by=user_data.get("userPrincipalName", "unknown"),
-                                requested_at=request_time,
-                                graph_metadata={
-                                    "graphChatType": graph_chat_type,
-                                    "chatTopic": chat_topic,
-                                    "memberCount": len(members),
-                                },
-                            )
-                            mentions.append(mention)
-
-                            if len(mentions) >= limit:
-                                print(f"[TEAMS] Returning {len(mentions)} real messages from chats")
-                                return mentions
-
-                    if mentions:
-                        print(f"[TEAMS] Returning {len(mentions)} real messages from chats")
-                        return mentions[:limit]
-                else:
-                    print(f"[TEAMS] Chats endpoint failed: {chats_response.status_code} - {chats_response.text}")
-
-                # If no messages found, return mock data
-                print("[TEAMS] No messages found, returning mock data")
-                return self._get_mock_mentions(limit)
+                        mention = self._parse_message(
+                            msg,
+                            clean_text,
+                            msg.get("from", {}).get("user", {}) or {},
+                            chat_name=chat_name,
+                            team_name="Chat",
+                            is_from_channel=False,
+                            chat_type=our_chat_type,
+                            chat_id=chat_id,
+                            requested_by=user_data.get("userPrincipalName", "unknown"),
+                            requested_at=request_time,
+                            graph_metadata={
+                                "graphChatType": graph_chat_type,
+                                "chatTopic": chat_topic,
+                                "memberCount": len(members),
+                            },
+                        )
+                        mentions.append(mention)
+
+                        if len(mentions) >= limit:
+                            logger.debug("Returning %d real messages from chats", len(mentions))
+                            return mentions
+
+                if mentions:
+                    logger.debug("Returning %d real messages from chats", len(mentions))
+                    return mentions[:limit]
+            else:
+                logger.warning("Chats endpoint failed: %s - %s", chats_response["status"], chats_response.get("body"))
+
+            # If no messages found, return mock data
+            logger.info("No messages found, returning mock data")
+            return self._get_mock_mentions(limit)
 
         except TeamsServiceError:
             raise
         except Exception as e:
-            print(f"[TEAMS] Error fetching mentions with token: {e}")
+            logger.error("Error fetching mentions with token: %s", e)
             raise TeamsServiceError(f"Failed to fetch mentions: {str(e)}")
 
 
@@ -0,0 +1,178 @@
+"""
+Streaming JSON parsing of Gemini replies, and how analyze_tasks maps the
+de-duplicated prompt's results back onto the caller's inputs.
+"""
+import asyncio
+import json
+import re
+
+import pytest
+
+from app.services import ai_service
+from app.services.ai_service import AIService, stream_json_array
+
+
+@pytest.fixture(autouse=True)
+def clear_ai_cache():
+    ai_service._ai_result_cache.clear()
+    yield
+    ai_service._ai_result_cache.clear()
+
+
+def _fake_reply(monkeypatch, reply_for_prompt, chunk_size=7):
+    """Serve reply_for_prompt(prompt) from stream_response_text in small chunks."""
+    prompts = []
+
+    async def fake_stream(prompt):
+        prompts.append(prompt)
+        reply = reply_for_prompt(prompt)
+        for start in range(0, len(reply), chunk_size):
+            yield reply[start:start + chunk_size]
+
+    monkeypatch.setattr(ai_service, "stream_response_text", fake_stream)
+    return prompts
+
+
+async def _collect(prompt="p"):
+    return [item async for item in stream_json_array(prompt)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1000])
+def test_stream_json_array_skips_leading_prose(monkeypatch, chunk_size):
+    # -4.5e2 and 12.5 can be split mid-number at any chunk size
+    reply = 'Sure! Here is the analysis:\n```json\n[{"a": "x, y ]"}, [1, 2], "s", 123, -4.5e2, 12.5, true, null]\n```'
+    _fake_reply(monkeypatch, lambda _: reply, chunk_size)
+    assert asyncio.run(_collect()) == [{"a": "x, y ]"}, [1, 2], "s", 123, -450.0, 12.5, True, None]
+
+
+def test_stream_json_array_empty_array(monkeypatch):
+    _fake_reply(monkeypatch, lambda _: "```json\n[ ]\n```")
+    assert asyncio.run(_collect()) == []
+
+
+def test_stream_json_array_yields_elements_before_the_reply_ends(monkeypatch):
+    received = []
+
+    async def fake_stream(prompt):
+        yield '[{"n": 1}, '
+        # The first element is out before the rest of the reply arrives
+        assert received == [{"n": 1}]
+        yield '{"n": 2}]'
+
+    monkeypatch.setattr(ai_service, "stream_response_text", fake_stream)
+
+    async def consume():
+        async for item in stream_json_array("p"):
+            received.append(item)
+
+    asyncio.run(consume())
+    assert received == [{"n": 1}, {"n": 2}]
+
+
+@pytest.mark.parametrize("reply", [
+    '[{"n": 1}, {"n": 2',
+    '[{"n": 1}, 12',
+    'No JSON here',
+])
+def test_stream_json_array_truncated_reply_raises(monkeypatch, reply):
+    _fake_reply(monkeypatch, lambda _: reply)
+    with pytest.raises(ValueError):
+        asyncio.run(_collect())
+
+
+def _prompt_tasks(prompt):
+    """The numbered tasks sent in an analyze_tasks prompt, in prompt order."""
+    listing = prompt.split("TASKS TO ANALYZE:\n", 1)[1]
+    return [re.sub(r"^\d+\. ", "", line) for line in listing.splitlines()]
+
+
+def _analysis_reply(prompt):
+    """One valid result per prompt task, identifying the task it came from."""
+    tasks = _prompt_tasks(prompt)
+    results = [
+        {
+            "category": "deploy" if "deploy" in task else "email" if "email" in task else "other",
+            "time": None,
+            # Every task depends on the first one in the prompt
+            "depends_on_indices": [1] if position else [],
+            "is_valid": True,
+            "improved_text": f"Please {task} today",
+        }
+        for position, task in enumerate(tasks)
+    ]
+    return "Here you go:\n```json\n" + json.dumps(results) + "\n```"
+
+
+DEPLOY = "deploy the api to production"
+EMAIL = "send an email to the team about the release"
+REVIEW = "review the pull request for the auth module"
+
+
+def test_analyze_tasks_preserves_input_order(monkeypatch):
+    prompts = _fake_reply(monkeypatch, _analysis_reply)
+    results = asyncio.run(AIService.analyze_tasks([REVIEW, DEPLOY, EMAIL]))
+
+    assert _prompt_tasks(prompts[0]) == [REVIEW, DEPLOY, EMAIL]
+    assert [r["improved_text"] for r in results] == [f"Please {t} today" for t in (REVIEW, DEPLOY, EMAIL)]
+    assert [r["category"] for r in results] == ["other", "deploy", "email"]
+    assert [r["depends_on_indices"] for r in results] == [[], [1], [1]]
+
+
+def test_analyze_tasks_sends_duplicates_once(monkeypatch):
+    prompts = _fake_reply(monkeypatch, _analysis_reply)
+    inputs = [DEPLOY, EMAIL, DEPLOY, REVIEW, EMAIL]
+    results = asyncio.run(AIService.analyze_tasks(inputs))
+
+    assert _prompt_tasks(prompts[0]) == [DEPLOY, EMAIL, REVIEW]
+    assert [r["improved_text"] for r in results] == [f"Please {t} today" for t in inputs]
+    # Dependencies point at the first input sent in the referenced slot
+    assert [r["depends_on_indices"] for r in results] == [[], [1], [], [1], [1]]
+    # Duplicates get their own copies
+    results[0]["category"] = "changed"
+    assert results[2]["category"] == "deploy"
+
+
+def test_analyze_tasks_noise_keeps_positions(monkeypatch):
+    prompts = _fake_reply(monkeypatch, _analysis_reply)
+    results = asyncio.run(AIService.analyze_tasks(["ok", EMAIL, "", DEPLOY, "thanks"]))
+
+    assert _prompt_tasks(prompts[0]) == [EMAIL, DEPLOY]
+    assert [r["is_valid"] for r in results] == [False, True, False, True, False]
+    assert results[1]["improved_text"] == f"Please {EMAIL} today"
+    # The prompt's task 1 (EMAIL) is input 2
+    assert results[3]["improved_text"] == f"Please {DEPLOY} today"
+    assert results[3]["depends_on_indices"] == [2]
+    assert results[0]["reason"] == "Filtered as noise in pre-processing"
+
+
+def test_analyze_tasks_short_reply_marks_missing_results(monkeypatch):
+    def short_reply(prompt):
+        full = json.loads(_analysis_reply(prompt).split("```json\n", 1)[1].rsplit("\n```", 1)[0])
+        return json.dumps(full[:1])
+
+    _fake_reply(monkeypatch, short_reply)
+    results = asyncio.run(AIService.analyze_tasks([DEPLOY, EMAIL]))
+
+    assert results[0]["improved_text"] == f"Please {DEPLOY} today"
+    assert results[1] == {
+        "category": "other", "time": None, "depends_on_indices": [],
+        "is_valid": False, "reason": "AI did not return result",
+    }
+
+
+def test_analyze_tasks_truncated_reply_falls_back(monkeypatch):
+    _fake_reply(monkeypatch, lambda prompt: _analysis_reply(prompt)[:60])
+    results = asyncio.run(AIService.analyze_tasks([DEPLOY, EMAIL]))
+
+    assert len(results) == 2
+    assert all(not r["is_valid"] and r["reason"].startswith("AI analysis error") for r in results)
+
+
+def test_analyze_tasks_serves_repeat_batches_from_cache(monkeypatch):
+    prompts = _fake_reply(monkeypatch, _analysis_reply)
+    first = asyncio.run(AIService.analyze_tasks([DEPLOY, EMAIL]))
+    second = asyncio.run(AIService.analyze_tasks([DEPLOY, EMAIL, DEPLOY]))
+
+    assert len(prompts) == 1
+    assert second[:2] == first
+    assert second[2] == first[0]
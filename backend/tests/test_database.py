@@ -0,0 +1,122 @@
+"""
+Startup migration of databases created with the old Enum column layout.
+
+The SQLite case always runs; the Postgres case (native ENUM types) runs when
+TEST_POSTGRES_URL points at a scratch database.
+"""
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import (
+    Boolean, Column, DateTime, Enum, ForeignKey, Integer, MetaData, String, Table, Text,
+    create_engine, inspect, select, text,
+)
+
+from app.core import database
+from app.models.reminder import ReminderStatus
+from app.models.task import TaskCategory, TaskPriority, TaskStatus
+
+
+def _old_layout(metadata: MetaData):
+    """The tasks/reminders columns as they were declared with sqlalchemy Enum."""
+    tasks = Table(
+        "tasks", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", String(50), index=True),
+        Column("raw_text", Text, nullable=False),
+        Column("clean_text", Text, nullable=False),
+        Column("original_message", Text),
+        Column("category", Enum(TaskCategory)),
+        Column("status", Enum(TaskStatus)),
+        Column("priority", Enum(TaskPriority)),
+        Column("jira_ticket", String(50)),
+        Column("assigned_to", String(100)),
+        Column("due_at", DateTime),
+        Column("depends_on_json", Text),
+        Column("was_improved", Boolean),
+        Column("improvement_history_json", Text),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+    )
+    reminders = Table(
+        "reminders", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("task_id", Integer, ForeignKey("tasks.id"), nullable=False),
+        Column("remind_at", DateTime, nullable=False),
+        Column("status", Enum(ReminderStatus)),
+        Column("created_at", DateTime),
+    )
+    return tasks, reminders
+
+
+def _migrate_old_database(engine, monkeypatch):
+    metadata = MetaData()
+    tasks, reminders = _old_layout(metadata)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Enum columns persist the member names, e.g. "JIRA_UPDATE"
+        conn.execute(tasks.insert(), [
+            {"id": 1, "raw_text": "a", "clean_text": "a", "category": TaskCategory.JIRA_UPDATE,
+             "status": TaskStatus.IN_PROGRESS, "priority": TaskPriority.HIGH},
+            {"id": 2, "raw_text": "b", "clean_text": "b", "category": TaskCategory.OTHER,
+             "status": TaskStatus.TODO, "priority": TaskPriority.LOW},
+        ])
+        conn.execute(reminders.insert(), [
+            {"id": 1, "task_id": 1, "remind_at": datetime(2024, 1, 1), "status": ReminderStatus.SENT},
+        ])
+
+    monkeypatch.setattr(database, "engine", engine)
+    database.normalize_enum_columns()
+    # Running again on a migrated database changes nothing
+    database.normalize_enum_columns()
+
+    with engine.begin() as conn:
+        task_rows = conn.execute(text(
+            "SELECT category, status, priority FROM tasks ORDER BY id"
+        )).all()
+        reminder_status = conn.execute(text("SELECT status FROM reminders")).scalar_one()
+        # New rows are written with the enum values
+        conn.execute(text(
+            "INSERT INTO tasks (id, raw_text, clean_text, category, status, priority) "
+            "VALUES (3, 'c', 'c', 'deploy', 'todo', 'medium')"
+        ))
+        conn.execute(text(
+            "INSERT INTO reminders (id, task_id, remind_at, status) "
+            "VALUES (2, 3, '2024-01-02 00:00:00', 'pending')"
+        ))
+
+    assert [tuple(row) for row in task_rows] == [
+        ("jira_update", "in_progress", "high"),
+        ("other", "todo", "low"),
+    ]
+    assert reminder_status == "sent"
+    return metadata
+
+
+def test_normalize_enum_columns_sqlite(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    _migrate_old_database(engine, monkeypatch)
+    engine.dispose()
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+def test_normalize_enum_columns_postgres(monkeypatch):
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    metadata = _migrate_old_database(engine, monkeypatch)
+    try:
+        inspector = inspect(engine)
+        for table, columns in database.ENUM_COLUMNS.items():
+            types = {c["name"]: c["type"] for c in inspector.get_columns(table)}
+            for column in columns:
+                assert isinstance(types[column], String) and not isinstance(types[column], Enum)
+        with engine.connect() as conn:
+            remaining = conn.execute(
+                select(text("typname")).select_from(text("pg_type"))
+                .where(text("typname IN ('taskcategory', 'taskstatus', 'taskpriority', 'reminderstatus')"))
+            ).all()
+        assert remaining == []
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
@@ -0,0 +1,97 @@
+"""
+Scheduling of the reminder check: waking at the next remind_at, and backing
+off after a failed check.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.reminder import Reminder, ReminderStatus
+from app.models.task import Task
+from app.services import scheduler
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'scheduler.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(scheduler, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def paused_scheduler(monkeypatch):
+    """A running but paused scheduler, so jobs are scheduled and never run."""
+    background = BackgroundScheduler()
+    background.start(paused=True)
+    monkeypatch.setattr(scheduler, "scheduler", background)
+    yield background
+    background.shutdown(wait=False)
+
+
+def _add_reminders(factory, *remind_ats):
+    db = factory()
+    task = Task(raw_text="deploy api", clean_text="deploy api")
+    db.add(task)
+    db.flush()
+    db.add_all(
+        Reminder(task_id=task.id, remind_at=remind_at, status=ReminderStatus.PENDING.value)
+        for remind_at in remind_ats
+    )
+    db.commit()
+    db.close()
+
+
+def _next_run(background) -> datetime:
+    next_run = background.get_job(scheduler.JOB_ID).next_run_time
+    return next_run.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def test_check_wakes_at_next_reminder(session_factory, paused_scheduler):
+    now = datetime.utcnow()
+    next_remind_at = now + timedelta(minutes=2)
+    _add_reminders(session_factory, now - timedelta(minutes=1), next_remind_at, now + timedelta(minutes=4))
+
+    scheduler.check_reminders()
+
+    db = session_factory()
+    statuses = db.execute(text("SELECT status FROM reminders ORDER BY remind_at")).scalars().all()
+    db.close()
+    assert statuses == ["sent", "pending", "pending"]
+    assert abs(_next_run(paused_scheduler) - next_remind_at) < timedelta(seconds=5)
+
+
+def test_check_sleeps_max_idle_without_reminders(session_factory, paused_scheduler):
+    scheduler.check_reminders()
+
+    expected = datetime.utcnow() + scheduler.MAX_IDLE
+    assert abs(_next_run(paused_scheduler) - expected) < timedelta(seconds=5)
+
+
+def test_failed_check_retries_after_delay(session_factory, paused_scheduler, monkeypatch):
+    # A due reminder stays pending when the check fails
+    _add_reminders(session_factory, datetime.utcnow() - timedelta(minutes=1))
+    monkeypatch.setattr(scheduler, "FIRE_DUE_REMINDERS", text("SELECT * FROM missing_table"))
+
+    scheduler.check_reminders()
+
+    expected = datetime.utcnow() + scheduler.RETRY_DELAY
+    assert abs(_next_run(paused_scheduler) - expected) < timedelta(seconds=5)
+
+
+def test_wake_for_reminder_only_moves_earlier(session_factory, paused_scheduler):
+    scheduler.check_reminders()
+    idle_run = _next_run(paused_scheduler)
+
+    scheduler.wake_for_reminder(idle_run + timedelta(minutes=1))
+    assert _next_run(paused_scheduler) == idle_run
+
+    sooner = datetime.utcnow() + timedelta(minutes=1)
+    scheduler.wake_for_reminder(sooner)
+    assert abs(_next_run(paused_scheduler) - sooner) < timedelta(seconds=1)
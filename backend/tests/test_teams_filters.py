@@ -0,0 +1,64 @@
+"""Filtering of Teams mentions by sender and chat, on mixed chat/channel/email input."""
+from datetime import datetime, timezone
+
+from app.services.teams_service import TeamsMention, apply_mention_filters, iter_filtered_mentions
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _mention(id, sender="Ann", **fields):
+    return TeamsMention(id=id, message_text="hi", sender_name=sender, timestamp=NOW, **fields)
+
+
+MENTIONS = [
+    _mention("group", chat_name="Dev Team", chat_type="group"),
+    _mention("other-group", chat_name="Design", chat_type="group"),
+    _mention("meeting", sender="Bob", chat_name="Sprint Sync", chat_type="meeting"),
+    _mention("individual", chat_name="Lisa Park", chat_type="individual"),
+    # Real channel mentions carry no chat_type
+    _mention("channel", team_name="Engineering", channel_name="General", is_from_channel=True),
+    _mention("other-channel", team_name="Engineering", channel_name="Random", is_from_channel=True),
+    _mention("email", sender="Bob", channel_name="Email", team_name="Outlook"),
+    _mention("unknown-type", chat_name="Bot", chat_type="unknown"),
+]
+
+
+def _ids(**filters):
+    return [m.id for m in apply_mention_filters(MENTIONS, **filters)]
+
+
+def test_no_filters_keeps_everything():
+    assert apply_mention_filters(MENTIONS) is MENTIONS
+    assert [m.id for m in iter_filtered_mentions(MENTIONS)] == [m.id for m in MENTIONS]
+
+
+def test_user_filter():
+    assert _ids(users="Bob") == ["meeting", "email"]
+    assert _ids(users="Bob, Nobody") == ["meeting", "email"]
+
+
+def test_chat_filter_only_applies_to_its_type():
+    assert _ids(group_chats="Dev Team") == [
+        "group", "meeting", "individual", "channel", "other-channel", "email",
+    ]
+    assert _ids(meeting_chats="Nothing") == [
+        "group", "other-group", "individual", "channel", "other-channel", "email",
+    ]
+
+
+def test_filters_for_several_types():
+    assert _ids(group_chats="Dev Team", meeting_chats="Sprint Sync", individual_chats="Someone") == [
+        "group", "meeting", "channel", "other-channel", "email",
+    ]
+
+
+def test_channel_names_in_group_filter():
+    # A "Team/Channel" name filters channel messages and, being a group
+    # filter, group chats too
+    assert _ids(group_chats="Engineering/General") == ["meeting", "individual", "channel", "email"]
+
+
+def test_user_and_chat_filters_combine():
+    assert _ids(users="Ann", group_chats="Design, Engineering/Random") == [
+        "other-group", "individual", "other-channel",
+    ]
@@ -0,0 +1,75 @@
+"""Background refresh of the Teams app token."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import teams_service as teams_module
+from app.services.teams_service import TeamsService
+
+
+class _Stop(Exception):
+    pass
+
+
+def _service(expires_in, fail=False):
+    token_calls = []
+
+    def handler(request):
+        token_calls.append(request)
+        if len(token_calls) > 10:
+            # A loop that never sleeps fails the test instead of hanging it
+            raise _Stop
+        if fail:
+            return httpx.Response(400, json={"error_description": "bad secret"})
+        return httpx.Response(200, json={"access_token": f"tok{len(token_calls)}", "expires_in": expires_in})
+
+    service = TeamsService()
+    service.client_id = service.client_secret = service.tenant_id = "x"
+    service._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service, token_calls
+
+
+def _run_loop(service, monkeypatch, sleeps=3):
+    """Run refresh_token_loop until it has slept `sleeps` times; return the waits."""
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+        if len(waits) >= sleeps:
+            raise _Stop
+
+    monkeypatch.setattr(teams_module.asyncio, "sleep", fake_sleep)
+    with pytest.raises(_Stop):
+        asyncio.run(service.refresh_token_loop())
+    return waits
+
+
+@pytest.mark.parametrize("expires_in", [60, 300])
+def test_short_lived_tokens_are_not_refetched_back_to_back(monkeypatch, expires_in):
+    service, token_calls = _service(expires_in)
+    waits = _run_loop(service, monkeypatch)
+    assert waits == [TeamsService.TOKEN_MIN_REFRESH_INTERVAL] * 3
+    assert len(token_calls) == 3
+
+
+def test_refresh_waits_until_buffered_expiry(monkeypatch):
+    service, token_calls = _service(3600)
+    waits = _run_loop(service, monkeypatch, sleeps=1)
+    # The buffer is taken off once: refresh TOKEN_REFRESH_AHEAD before expiry
+    assert 3600 - TeamsService.TOKEN_REFRESH_AHEAD - 5 < waits[0] <= 3600 - TeamsService.TOKEN_REFRESH_AHEAD
+    assert len(token_calls) == 1
+    assert service._has_valid_token()
+
+
+def test_failed_refresh_retries_after_delay(monkeypatch):
+    service, token_calls = _service(3600, fail=True)
+    waits = _run_loop(service, monkeypatch, sleeps=2)
+    assert waits == [TeamsService.TOKEN_RETRY_DELAY] * 2
+    assert len(token_calls) == 2
+
+
+def test_unconfigured_service_does_not_loop():
+    service = TeamsService()
+    service.client_id = None
+    asyncio.run(service.refresh_token_loop())